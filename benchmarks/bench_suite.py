@@ -0,0 +1,260 @@
+'''
+Offline benchmark suite for the public functions of this project.
+
+python benchmarks/bench_suite.py --output bench.json
+python benchmarks/bench_suite.py --function get_product_description --concurrency 1 8 32 \
+    --recording recording.json --latency latency.json
+
+AWS calls go to FakeAWS (see fake_aws.py). For every function and concurrency
+level the suite reports p50/p99 latency, throughput and errors, plus peak
+traced memory from a separate tracemalloc pass, and writes them as JSON.
+
+'''
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from fake_aws import FakeAWS
+
+def _sample_image(size=(1500, 1500)):
+    from PIL import Image
+
+    return Image.open(os.path.join(REPO_DIR, "images", "81GhOZYLMnL._AC_SL1500_.jpg")).convert("RGB").resize(size)
+
+def _setup_get_product_description(aws):
+    from image_tagging import get_product_description
+
+    image = _sample_image()
+    return lambda: get_product_description(image)
+
+def _setup_stream_product_description(aws):
+    from image_tagging import stream_product_description
+
+    image = _sample_image()
+    return lambda: list(stream_product_description(image))
+
+def _setup_stream_first_token(aws):
+    from image_tagging import stream_product_description
+
+    image = _sample_image()
+    return lambda: next(iter(stream_product_description(image)))
+
+def _setup_inpaint_with_mask_image(aws):
+    from PIL import Image
+    from inpainting import inpaint_with_mask_image
+
+    image = _sample_image((512, 512))
+    mask = Image.new("L", (512, 512), 255)
+    mask.paste(0, (128, 128, 384, 384))
+    return lambda: inpaint_with_mask_image(image, "a red apple", mask)
+
+def _setup_outpaint_with_mask_prompt(aws):
+    from outpainting import outpaint_with_mask_prompt
+
+    image = _sample_image((512, 512))
+    return lambda: outpaint_with_mask_prompt(image, "a mountain landscape", "tv monitor")
+
+def _setup_generate_video_from_image(aws):
+    import video_generation
+
+    video_generation.SLEEP_TIME = 0.05
+    image = _sample_image()
+    return lambda: video_generation.generate_video_from_image(image, "drone view flying over the product", None)
+
+def _setup_generate_storyboard(aws):
+    import shutil
+    import video_generation
+
+    video_generation.SLEEP_TIME = 0.05
+    shots = [(_sample_image(), f"shot {i} of the product") for i in range(STORYBOARD_SHOTS)]
+
+    def call():
+        clip_paths = video_generation.generate_storyboard(shots, output_path=None)
+        shutil.rmtree(os.path.dirname(clip_paths[0]), ignore_errors=True)
+    return call
+
+def _setup_analyze_video(aws):
+    import video_analysis
+
+    video_analysis.POLL_INTERVAL = 0.05
+    aws.put_object("testing-video-01242025", "sample-video/2U_ulXkfXqQ.mp4", aws.video_bytes)
+    project_arn = video_analysis.get_or_create_project(aws.client("bedrock-data-automation"))
+    runtime_client = aws.client("bedrock-data-automation-runtime")
+    return lambda: video_analysis.analyze_video(runtime_client, project_arn)
+
+def _upload_source(aws):
+    # One temporary source file per run, removed when the interpreter exits
+    import atexit
+    import tempfile
+
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(UPLOAD_MB):
+            f.write(chunk)
+    atexit.register(os.remove, f.name)
+    return f.name
+
+def _setup_upload_video_to_s3(aws):
+    import itertools
+    import video_analysis
+
+    path = _upload_source(aws)
+    s3_client = aws.client("s3")
+    keys = (f"bench/upload-{i}.mp4" for i in itertools.count())
+    return lambda: video_analysis.upload_video_to_s3(s3_client, path, "bench-bucket", next(keys),
+                                                     part_size=UPLOAD_PART_MB * 1024 * 1024)
+
+def _setup_upload_video_to_s3_unchanged(aws):
+    import video_analysis
+
+    path = _upload_source(aws)
+    s3_client = aws.client("s3")
+    part_size = UPLOAD_PART_MB * 1024 * 1024
+    video_analysis.upload_video_to_s3(s3_client, path, "bench-bucket", "bench/unchanged.mp4", part_size=part_size)
+    return lambda: video_analysis.upload_video_to_s3(s3_client, path, "bench-bucket", "bench/unchanged.mp4",
+                                                     part_size=part_size)
+
+def _setup_homography_transform(aws):
+    import numpy as np
+    from util import homography_transform, rotation
+
+    product = _sample_image((512, 512))
+    canvas = np.full((1024, 1024, 3), 255, dtype=np.uint8)
+    coordinates = rotation(300, 200, 30, 400, 300)
+    return lambda: homography_transform(product, canvas, coordinates)
+
+# Size of the local file uploaded by the upload benchmarks, and their part size
+UPLOAD_MB = 64
+UPLOAD_PART_MB = 8
+
+# Shots per storyboard; clips are not concatenated since fake clips are not real MP4s
+STORYBOARD_SHOTS = 8
+
+# Function name -> setup(aws) returning a zero-argument callable that makes one call
+BENCHMARKS = {
+    "get_product_description": _setup_get_product_description,
+    "stream_product_description": _setup_stream_product_description,
+    "stream_product_description_first_token": _setup_stream_first_token,
+    "inpaint_with_mask_image": _setup_inpaint_with_mask_image,
+    "outpaint_with_mask_prompt": _setup_outpaint_with_mask_prompt,
+    "generate_video_from_image": _setup_generate_video_from_image,
+    "generate_storyboard": _setup_generate_storyboard,
+    "analyze_video": _setup_analyze_video,
+    "upload_video_to_s3": _setup_upload_video_to_s3,
+    "upload_video_to_s3_unchanged": _setup_upload_video_to_s3_unchanged,
+    "homography_transform": _setup_homography_transform,
+}
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+def _timed(call):
+    started = time.perf_counter()
+    try:
+        call()
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return time.perf_counter() - started, type(e).__name__
+
+def run_level(call, concurrency, calls):
+    """
+    Make `calls` calls from `concurrency` threads
+
+    Returns:
+        dict: Latency percentiles in ms, throughput in calls/s and error counts
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        outcomes = list(executor.map(lambda _: _timed(call), range(calls)))
+        wall = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for seconds, error in outcomes if error is None]
+    errors = {}
+    for _, error in outcomes:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    return {
+        "calls": calls,
+        "ok": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) if latencies else None,
+        "p99_ms": percentile(latencies, 99) if latencies else None,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "throughput_per_s": len(latencies) / wall,
+        "wall_s": wall,
+    }
+
+def peak_memory(call, concurrency):
+    """Peak traced memory in MB of one round of `concurrency` concurrent calls"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda _: _timed(call), range(concurrency)))
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def main():
+    global UPLOAD_MB, UPLOAD_PART_MB
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--function", action="append", choices=sorted(BENCHMARKS), help="Function(s) to benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--calls-per-worker", type=int, default=4)
+    parser.add_argument("--recording", help="Recorded responses to replay (see fake_aws.record)")
+    parser.add_argument("--latency", help="JSON file of per-operation latency overrides")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--upload-mb", type=int, default=UPLOAD_MB, help="Size of the file uploaded to fake S3")
+    parser.add_argument("--upload-part-mb", type=int, default=UPLOAD_PART_MB, help="Multipart upload part size")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    UPLOAD_MB, UPLOAD_PART_MB = args.upload_mb, args.upload_part_mb
+
+    aws = FakeAWS.from_files(args.recording, args.latency, seed=args.seed)
+    results = []
+    with aws.install():
+        for name in args.function or BENCHMARKS:
+            # The functions print progress; keep it out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                call = BENCHMARKS[name](aws)
+            for concurrency in args.concurrency:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = run_level(call, concurrency, concurrency * args.calls_per_worker)
+                    if not args.no_memory:
+                        result["peak_memory_mb"] = peak_memory(call, concurrency)
+                result.update(function=name, concurrency=concurrency)
+                results.append(result)
+                p50 = f"{result['p50_ms']:9.1f}" if result["p50_ms"] is not None else "      n/a"
+                p99 = f"{result['p99_ms']:9.1f}" if result["p99_ms"] is not None else "      n/a"
+                print(f"{name:>26} c={concurrency:<3} p50={p50} ms p99={p99} ms "
+                      f"{result['throughput_per_s']:8.1f}/s errors={result['errors']}"
+                      + (f" peak={result['peak_memory_mb']:.1f} MB" if "peak_memory_mb" in result else ""))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": time.time(),
+                "python": sys.version,
+                "platform": platform.platform(),
+                "latency": {op: vars(model) for op, model in aws.latency.items()},
+                "results": results,
+            }, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,561 @@
+'''
+Local stand-in for the Bedrock, Bedrock Data Automation and S3 calls made by
+this project, so its performance can be measured without AWS access.
+
+    fake = FakeAWS.from_files(recording_path="recording.json", latency_path="latency.json")
+    with fake.install():
+        get_product_description(image)   # boto3.client(...) now returns fake clients
+
+Responses are replayed from a recording (see record()) or synthesized when no
+recording is given: model responses, Nova Reel and Data Automation job durations
+and outcomes, the Data Automation standard output and the size of generated
+videos. Each call sleeps for a latency drawn from a log-normal distribution and
+fails with a ClientError at a configurable rate.
+
+'''
+import base64
+import hashlib
+import io
+import itertools
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from unittest import mock
+
+# Operation -> latency model. "async_job" and "bda_job" are the simulated
+# durations of a Nova Reel job and a Data Automation job.
+DEFAULT_LATENCY = {
+    "invoke_model": {"median_ms": 200, "sigma": 0.3, "error_rate": 0.0},
+    "invoke_model_with_response_stream": {"median_ms": 60, "sigma": 0.3, "error_rate": 0.0},
+    "stream_chunk": {"median_ms": 20, "sigma": 0.2, "error_rate": 0.0},
+    "start_async_invoke": {"median_ms": 50, "sigma": 0.2, "error_rate": 0.0},
+    "get_async_invoke": {"median_ms": 20, "sigma": 0.2, "error_rate": 0.0},
+    "async_job": {"median_ms": 500, "sigma": 0.3, "error_rate": 0.0},
+    "s3": {"median_ms": 10, "sigma": 0.3, "error_rate": 0.0},
+    "s3_part": {"median_ms": 80, "sigma": 0.3, "error_rate": 0.0},
+    "bda": {"median_ms": 30, "sigma": 0.2, "error_rate": 0.0},
+    "bda_job": {"median_ms": 500, "sigma": 0.3, "error_rate": 0.0},
+}
+
+class LatencyModel:
+    """Log-normal latency with a fixed error rate for one operation"""
+
+    def __init__(self, median_ms, sigma=0.0, error_rate=0.0, error_code="ThrottlingException"):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_code = error_code
+
+    def sample_seconds(self, rng):
+        return self.median_ms * math.exp(rng.gauss(0.0, self.sigma)) / 1000
+
+    def fails(self, rng):
+        return rng.random() < self.error_rate
+
+def _client_error(code, operation_name, message="Injected by FakeAWS"):
+    from botocore.exceptions import ClientError
+
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation_name)
+
+def _png_base64(size=(512, 512), color=(128, 128, 128)):
+    from PIL import Image
+
+    buffered = io.BytesIO()
+    Image.new("RGB", size, color).save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf8")
+
+def _synthetic_body(model_id, request):
+    # Minimal well-formed responses for the models this project calls
+    if model_id.startswith("anthropic."):
+        return json.dumps({"content": [{"type": "text", "text": "red running shoe"}]}).encode()
+    config = request.get("imageGenerationConfig", {})
+    size = (config.get("width", 512), config.get("height", 512))
+    return json.dumps({"images": [_png_base64(size)]}).encode()
+
+class FakeAWS:
+    """
+    Shared in-memory state behind fake clients for every service
+
+    Args:
+        recording (dict): Recorded responses, as written by record()
+        latency (dict): Per-operation overrides of DEFAULT_LATENCY
+        seed (int): Seed for latency and error sampling
+        video_bytes (bytes): Content of every generated output.mp4; zeros of the
+                             recorded video size (or 1 MiB) if None
+    """
+
+    def __init__(self, recording=None, latency=None, seed=0, video_bytes=None):
+        self.latency = {op: LatencyModel(**params) for op, params in DEFAULT_LATENCY.items()}
+        for op, params in (latency or {}).items():
+            self.latency[op] = LatencyModel(**{**DEFAULT_LATENCY.get(op, {}), **params})
+        self.recording = recording or {}
+        self.replay = {model_id: itertools.cycle(bodies)
+                       for model_id, bodies in self.recording.get("invoke_model", {}).items() if bodies}
+        # Recorded job outcomes replace the sampled duration and success of background jobs
+        async_jobs = [job for jobs in self.recording.get("async_invoke", {}).values() for job in jobs]
+        self.job_replay = {op: itertools.cycle(jobs) for op, jobs in (
+            ("async_job", async_jobs), ("bda_job", self.recording.get("data_automation", []))) if jobs}
+        self.rng = random.Random(seed)
+        if video_bytes is None:
+            video_bytes = b"\x00" * self.recording.get("video_output_bytes", 1024 * 1024)
+        self.video_bytes = video_bytes
+        self.objects = {}     # (bucket, key) -> bytes
+        self.object_meta = {} # (bucket, key) -> {"ETag": ..., "Metadata": ...}
+        self.uploads = {}     # multipart upload ID -> {part number: bytes}
+        self.jobs = {}        # invocation ARN -> job state
+        self.lock = threading.Lock()
+        self.calls = {}       # operation -> count
+
+    @classmethod
+    def from_files(cls, recording_path=None, latency_path=None, **kwargs):
+        recording = latency = None
+        if recording_path:
+            with open(recording_path, encoding="utf-8") as f:
+                recording = json.load(f)
+        if latency_path:
+            with open(latency_path, encoding="utf-8") as f:
+                latency = json.load(f)
+        return cls(recording=recording, latency=latency, **kwargs)
+
+    def _sample(self, op):
+        with self.lock:
+            self.calls[op] = self.calls.get(op, 0) + 1
+            model = self.latency[op]
+            return model.sample_seconds(self.rng), model.fails(self.rng), model.error_code
+
+    def simulate(self, op, operation_name=None):
+        """Sleep for one sampled latency of `op`, then raise if an error was drawn"""
+        seconds, fails, code = self._sample(op)
+        time.sleep(seconds)
+        if fails:
+            raise _client_error(code, operation_name or op)
+
+    def job_outcome(self, op):
+        """Sample (or replay) the duration and success of a simulated background job"""
+        seconds, fails, _ = self._sample(op)
+        with self.lock:
+            replay = self.job_replay.get(op)
+            if replay is not None:
+                job = next(replay)
+                return time.monotonic() + job["duration_s"], job["status"] in ("Completed", "Success")
+        return time.monotonic() + seconds, not fails
+
+    def next_body(self, model_id, request):
+        with self.lock:
+            replay = self.replay.get(model_id)
+            if replay is not None:
+                return base64.b64decode(next(replay))
+        return _synthetic_body(model_id, request)
+
+    def put_object(self, bucket, key, data, metadata=None, etag=None):
+        data = bytes(data)
+        with self.lock:
+            self.objects[(bucket, key)] = data
+            self.object_meta[(bucket, key)] = {
+                "ETag": f'"{etag or hashlib.md5(data).hexdigest()}"',
+                "Metadata": dict(metadata or {})
+            }
+
+    def get_object(self, bucket, key, operation_name):
+        with self.lock:
+            data = self.objects.get((bucket, key))
+        if data is None:
+            raise _client_error("NoSuchKey", operation_name, f"s3://{bucket}/{key} does not exist")
+        return data
+
+    def client(self, service_name=None, *args, **kwargs):
+        """Drop-in replacement for boto3.client"""
+        clients = {
+            "bedrock-runtime": FakeBedrockRuntime,
+            "s3": FakeS3,
+            "bedrock-data-automation": FakeDataAutomation,
+            "bedrock-data-automation-runtime": FakeDataAutomationRuntime,
+        }
+        if service_name not in clients:
+            raise ValueError(f"FakeAWS does not implement service {service_name}")
+        return clients[service_name](self)
+
+    @contextmanager
+    def install(self):
+        """Patch boto3.client so every client created inside the block is a fake"""
+        with mock.patch("boto3.client", side_effect=self.client):
+            yield self
+
+class FakeEventStream:
+    """Iterable of Bedrock response stream events that can be closed mid-stream"""
+
+    def __init__(self, aws, payloads):
+        self.aws = aws
+        self.payloads = payloads
+        self.closed = False
+
+    def __iter__(self):
+        for payload in self.payloads:
+            if self.closed:
+                return
+            self.aws.simulate("stream_chunk", "InvokeModelWithResponseStream")
+            yield {"chunk": {"bytes": json.dumps(payload).encode()}}
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            with self.aws.lock:
+                self.aws.calls["stream_cancelled"] = self.aws.calls.get("stream_cancelled", 0) + 1
+
+def _text_stream_payloads(text):
+    # Claude messages stream events, one text delta per word (with its leading space)
+    words = text.split(" ")
+    deltas = [words[0]] + [" " + word for word in words[1:]]
+    return ([{"type": "message_start"}, {"type": "content_block_start", "index": 0}]
+            + [{"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": delta}}
+               for delta in deltas]
+            + [{"type": "content_block_stop", "index": 0}, {"type": "message_stop"}])
+
+class FakeBedrockRuntime:
+    def __init__(self, aws):
+        self.aws = aws
+
+    def invoke_model(self, body, modelId, accept=None, contentType=None, **kwargs):
+        self.aws.simulate("invoke_model", "InvokeModel")
+        request = json.loads(body)
+        return {"body": io.BytesIO(self.aws.next_body(modelId, request)), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(self, body, modelId, accept=None, contentType=None, **kwargs):
+        self.aws.simulate("invoke_model_with_response_stream", "InvokeModelWithResponseStream")
+        response_body = json.loads(self.aws.next_body(modelId, json.loads(body)))
+        text = response_body["content"][0]["text"]
+        return {"body": FakeEventStream(self.aws, _text_stream_payloads(text)), "contentType": "application/json"}
+
+    def start_async_invoke(self, modelId, modelInput, outputDataConfig, **kwargs):
+        self.aws.simulate("start_async_invoke", "StartAsyncInvoke")
+        job_id = uuid.uuid4().hex[:12]
+        invocation_arn = f"arn:aws:bedrock:us-east-1:000000000000:async-invoke/{job_id}"
+        bucket = outputDataConfig["s3OutputDataConfig"]["s3Uri"].replace("s3://", "").split("/")[0]
+        ready_at, succeeds = self.aws.job_outcome("async_job")
+        with self.aws.lock:
+            self.aws.jobs[invocation_arn] = {
+                "ready_at": ready_at, "succeeds": succeeds, "bucket": bucket, "prefix": job_id, "done": False
+            }
+        return {"invocationArn": invocation_arn}
+
+    def get_async_invoke(self, invocationArn, **kwargs):
+        self.aws.simulate("get_async_invoke", "GetAsyncInvoke")
+        with self.aws.lock:
+            job = self.aws.jobs[invocationArn]
+        if time.monotonic() < job["ready_at"]:
+            return {"invocationArn": invocationArn, "status": "InProgress"}
+        if not job["succeeds"]:
+            return {"invocationArn": invocationArn, "status": "Failed", "failureMessage": "Injected by FakeAWS"}
+        if not job["done"]:
+            self.aws.put_object(job["bucket"], f"{job['prefix']}/output.mp4", self.aws.video_bytes)
+            job["done"] = True
+        return {"invocationArn": invocationArn, "status": "Completed"}
+
+class FakeS3:
+    def __init__(self, aws):
+        self.aws = aws
+
+    def get_object(self, Bucket, Key, **kwargs):
+        self.aws.simulate("s3", "GetObject")
+        data = self.aws.get_object(Bucket, Key, "GetObject")
+        return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self.aws.simulate("s3", "HeadObject")
+        with self.aws.lock:
+            meta = self.aws.object_meta.get((Bucket, Key))
+            size = len(self.aws.objects.get((Bucket, Key), b""))
+        if meta is None:
+            raise _client_error("404", "HeadObject", "Not Found")
+        return {**meta, "ContentLength": size}
+
+    def put_object(self, Bucket, Key, Body=b"", Metadata=None, **kwargs):
+        self.aws.simulate("s3", "PutObject")
+        self.aws.put_object(Bucket, Key, Body.read() if hasattr(Body, "read") else Body, Metadata)
+        with self.aws.lock:
+            return {"ETag": self.aws.object_meta[(Bucket, Key)]["ETag"]}
+
+    def create_multipart_upload(self, Bucket, Key, Metadata=None, **kwargs):
+        self.aws.simulate("s3", "CreateMultipartUpload")
+        upload_id = uuid.uuid4().hex
+        with self.aws.lock:
+            self.aws.uploads[upload_id] = {"parts": {}, "metadata": Metadata}
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        self.aws.simulate("s3_part", "UploadPart")
+        with self.aws.lock:
+            if UploadId not in self.aws.uploads:
+                raise _client_error("NoSuchUpload", "UploadPart")
+            self.aws.uploads[UploadId]["parts"][PartNumber] = data
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.aws.simulate("s3", "CompleteMultipartUpload")
+        with self.aws.lock:
+            upload = self.aws.uploads.pop(UploadId)
+        parts = [upload["parts"][part["PartNumber"]] for part in MultipartUpload["Parts"]]
+        digests = b"".join(hashlib.md5(part).digest() for part in parts)
+        etag = f"{hashlib.md5(digests).hexdigest()}-{len(parts)}"
+        self.aws.put_object(Bucket, Key, b"".join(parts), upload["metadata"], etag)
+        return {"Bucket": Bucket, "Key": Key, "ETag": f'"{etag}"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self.aws.simulate("s3", "AbortMultipartUpload")
+        with self.aws.lock:
+            self.aws.uploads.pop(UploadId, None)
+        return {}
+
+    def download_fileobj(self, Bucket, Key, Fileobj, **kwargs):
+        self.aws.simulate("s3", "GetObject")
+        Fileobj.write(self.aws.get_object(Bucket, Key, "GetObject"))
+
+    def download_file(self, Bucket, Key, Filename, **kwargs):
+        self.aws.simulate("s3", "GetObject")
+        data = self.aws.get_object(Bucket, Key, "GetObject")
+        with open(Filename, "wb") as f:
+            f.write(data)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, **kwargs):
+        self.aws.simulate("s3", "PutObject")
+        self.aws.put_object(Bucket, Key, Fileobj.read())
+
+class FakeDataAutomation:
+    def __init__(self, aws):
+        self.aws = aws
+
+    def create_data_automation_project(self, projectName, **kwargs):
+        self.aws.simulate("bda", "CreateDataAutomationProject")
+        return {"projectArn": f"arn:aws:bedrock:us-west-2:000000000000:data-automation-project/{projectName}"}
+
+class FakeDataAutomationRuntime:
+    def __init__(self, aws):
+        self.aws = aws
+
+    def invoke_data_automation_async(self, inputConfiguration, outputConfiguration, **kwargs):
+        self.aws.simulate("bda", "InvokeDataAutomationAsync")
+        job_id = uuid.uuid4().hex[:12]
+        invocation_arn = f"arn:aws:bedrock:us-west-2:000000000000:data-automation-invocation/{job_id}"
+        output_uri = f"{outputConfiguration['s3Uri'].rstrip('/')}/{job_id}"
+        ready_at, succeeds = self.aws.job_outcome("bda_job")
+        with self.aws.lock:
+            self.aws.jobs[invocation_arn] = {
+                "ready_at": ready_at, "succeeds": succeeds, "input_uri": inputConfiguration["s3Uri"],
+                "output_uri": output_uri, "done": False
+            }
+        return {"invocationArn": invocation_arn}
+
+    def get_data_automation_status(self, invocationArn, **kwargs):
+        self.aws.simulate("bda", "GetDataAutomationStatus")
+        with self.aws.lock:
+            job = self.aws.jobs[invocationArn]
+        if time.monotonic() < job["ready_at"]:
+            return {"status": "InProgress"}
+        if not job["succeeds"]:
+            return {"status": "ServiceError", "errorType": "InjectedError", "errorMessage": "Injected by FakeAWS"}
+
+        bucket, prefix = job["output_uri"].replace("s3://", "").split("/", 1)
+        metadata_key = f"{prefix}/job_metadata.json"
+        if not job["done"]:
+            standard_key = f"{prefix}/0/standard_output/0/result.json"
+            standard_output = self.aws.recording.get("bda_standard_output", {
+                "metadata": {"s3_key": job["input_uri"]},
+                "video": {"summary": "A product demo video."}
+            })
+            self.aws.put_object(bucket, standard_key, json.dumps(standard_output).encode())
+            job_metadata = {"output_metadata": [{"segment_metadata": [
+                {"standard_output_path": f"s3://{bucket}/{standard_key}"}
+            ]}]}
+            self.aws.put_object(bucket, metadata_key, json.dumps(job_metadata).encode())
+            job["done"] = True
+        return {"status": "Success", "outputConfiguration": {"s3Uri": f"s3://{bucket}/{metadata_key}"}}
+
+class _RecordingStream:
+    """Wraps a response stream and records its text as an invoke_model body once it ends"""
+
+    def __init__(self, stream, on_done):
+        self.stream = stream
+        self.on_done = on_done
+        self.text = ""
+        self.done = False
+
+    def __iter__(self):
+        try:
+            for event in self.stream:
+                chunk = event.get("chunk")
+                if chunk:
+                    message = json.loads(chunk["bytes"])
+                    if message.get("type") == "content_block_delta":
+                        self.text += message["delta"].get("text", "")
+                yield event
+        finally:
+            self._finish()
+
+    def close(self):
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+        self._finish()
+
+    def _finish(self):
+        if not self.done:
+            self.done = True
+            self.on_done(json.dumps({"content": [{"type": "text", "text": self.text}]}).encode())
+
+@contextmanager
+def record(path):
+    """
+    Record real AWS responses to `path` for later replay by FakeAWS
+
+    Every boto3 client created inside the block is wrapped; the file is written on exit.
+    What is recorded, by service:
+
+    - bedrock-runtime: invoke_model bodies per model ID (streamed responses are
+      stored as the equivalent invoke_model body), and the duration and final
+      status of each Nova Reel job from start_async_invoke to its last poll
+    - bedrock-data-automation-runtime: the duration and final status of each job
+    - s3: the Data Automation standard output and the size of generated videos
+      (output.mp4), as read by this project; other objects live in the fake's memory
+
+    Latencies of individual calls are not recorded; pass them to FakeAWS separately.
+    """
+    import boto3
+
+    real_client = boto3.client
+    recording = {"invoke_model": {}, "async_invoke": {}, "data_automation": []}
+    started = {}  # invocation ARN -> (model ID or None, start time)
+    lock = threading.Lock()
+
+    def add_body(model_id, body):
+        with lock:
+            recording["invoke_model"].setdefault(model_id, []).append(base64.b64encode(body).decode("ascii"))
+
+    def start_job(invocation_arn, model_id):
+        with lock:
+            started[invocation_arn] = (model_id, time.monotonic())
+
+    def end_job(invocation_arn, status, pending):
+        # Record a job once, on the first poll that reports a final status
+        if status in pending:
+            return
+        with lock:
+            job = started.pop(invocation_arn, None)
+            if job is None:
+                return
+            model_id, start = job
+            entry = {"status": status, "duration_s": time.monotonic() - start}
+            if model_id is None:
+                recording["data_automation"].append(entry)
+            else:
+                recording["async_invoke"].setdefault(model_id, []).append(entry)
+
+    def record_object(key, data):
+        if key.endswith("output.mp4"):
+            with lock:
+                recording["video_output_bytes"] = len(data)
+        elif "/standard_output/" in key:
+            with lock:
+                recording["bda_standard_output"] = json.loads(data)
+
+    def wrap_bedrock_runtime(client):
+        real_invoke = client.invoke_model
+        real_stream = client.invoke_model_with_response_stream
+        real_start = client.start_async_invoke
+        real_status = client.get_async_invoke
+
+        def invoke_model(**invoke_kwargs):
+            response = real_invoke(**invoke_kwargs)
+            body = response["body"].read()
+            add_body(invoke_kwargs["modelId"], body)
+            response["body"] = io.BytesIO(body)
+            return response
+
+        def invoke_model_with_response_stream(**invoke_kwargs):
+            response = real_stream(**invoke_kwargs)
+            response["body"] = _RecordingStream(
+                response["body"], lambda body: add_body(invoke_kwargs["modelId"], body))
+            return response
+
+        def start_async_invoke(**invoke_kwargs):
+            response = real_start(**invoke_kwargs)
+            start_job(response["invocationArn"], invoke_kwargs["modelId"])
+            return response
+
+        def get_async_invoke(**invoke_kwargs):
+            response = real_status(**invoke_kwargs)
+            end_job(invoke_kwargs["invocationArn"], response["status"], ("InProgress",))
+            return response
+
+        client.invoke_model = invoke_model
+        client.invoke_model_with_response_stream = invoke_model_with_response_stream
+        client.start_async_invoke = start_async_invoke
+        client.get_async_invoke = get_async_invoke
+
+    def wrap_data_automation_runtime(client):
+        real_invoke = client.invoke_data_automation_async
+        real_status = client.get_data_automation_status
+
+        def invoke_data_automation_async(**invoke_kwargs):
+            response = real_invoke(**invoke_kwargs)
+            start_job(response["invocationArn"], None)
+            return response
+
+        def get_data_automation_status(**invoke_kwargs):
+            response = real_status(**invoke_kwargs)
+            end_job(invoke_kwargs["invocationArn"], response["status"], ("Created", "InProgress"))
+            return response
+
+        client.invoke_data_automation_async = invoke_data_automation_async
+        client.get_data_automation_status = get_data_automation_status
+
+    def wrap_s3(client):
+        real_get = client.get_object
+        real_download_fileobj = client.download_fileobj
+        real_download_file = client.download_file
+
+        def get_object(**get_kwargs):
+            response = real_get(**get_kwargs)
+            data = response["Body"].read()
+            record_object(get_kwargs["Key"], data)
+            response["Body"] = io.BytesIO(data)
+            return response
+
+        def download_fileobj(Bucket, Key, Fileobj, **download_kwargs):
+            start = Fileobj.tell()
+            real_download_fileobj(Bucket, Key, Fileobj, **download_kwargs)
+            if Key.endswith("output.mp4"):
+                with lock:
+                    recording["video_output_bytes"] = Fileobj.tell() - start
+
+        def download_file(Bucket, Key, Filename, **download_kwargs):
+            real_download_file(Bucket, Key, Filename, **download_kwargs)
+            if Key.endswith("output.mp4"):
+                with lock:
+                    recording["video_output_bytes"] = os.path.getsize(Filename)
+
+        client.get_object = get_object
+        client.download_fileobj = download_fileobj
+        client.download_file = download_file
+
+    wrappers = {
+        "bedrock-runtime": wrap_bedrock_runtime,
+        "bedrock-data-automation-runtime": wrap_data_automation_runtime,
+        "s3": wrap_s3,
+    }
+
+    def recording_client(*args, **kwargs):
+        client = real_client(*args, **kwargs)
+        service_name = args[0] if args else kwargs.get("service_name")
+        if service_name in wrappers:
+            wrappers[service_name](client)
+        return client
+
+    with mock.patch("boto3.client", side_effect=recording_client):
+        yield recording
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(recording, f)
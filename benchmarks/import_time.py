@@ -0,0 +1,161 @@
+'''
+Measure cold-start import time of each entry point with `python -X importtime`.
+
+python benchmarks/import_time.py --output import_time.json
+python benchmarks/import_time.py --baseline import_time.json --threshold 1.2
+
+Each entry point is imported in a fresh interpreter several times; the median
+total and the heaviest top-level imports are reported. With --baseline the
+script exits non-zero when any entry point got slower than threshold x baseline,
+or when a lazily loaded dependency (boto3, cv2, gradio) is imported at start-up.
+
+'''
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def script_imports(script):
+    """
+    Collect the import statements a script runs at start-up
+
+    Running the script itself would need its host (e.g. `streamlit run`), so the
+    statements are read from its source instead: every import outside a function
+    body, in source order.
+
+    Args:
+        script (str): Script path relative to the repository root
+
+    Returns:
+        str: Code that performs the same imports
+    """
+    with open(os.path.join(REPO_DIR, script), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script)
+
+    statements = []
+    pending = list(reversed(tree.body))
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statements.append(ast.unparse(node))
+            continue
+        pending.extend(reversed(list(ast.iter_child_nodes(node))))
+    return "\n".join(statements)
+
+# Entry point name -> code that imports it without running its __main__ block
+ENTRY_POINTS = {
+    "image_tagging": "import image_tagging",
+    "inpainting": "import inpainting",
+    "outpainting": "import outpainting",
+    "mask_generation": "import mask_generation",
+    "image_dedupe": "import image_dedupe",
+    "util": "import util",
+    "video_generation": "import video_generation",
+    "video_analysis": "import video_analysis",
+    "vpp-gradio": "import runpy; runpy.run_path('vpp-gradio.py', run_name='vpp_gradio')",
+    "vpp-streamlit": script_imports("vpp-streamlit.py"),
+}
+
+# Dependencies that must only be loaded on first use
+LAZY_MODULES = ("boto3", "botocore", "cv2", "gradio")
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output
+
+    Args:
+        stderr (str): Standard error of the interpreter run
+
+    Returns:
+        tuple: (total microseconds over top-level imports, {top-level module: cumulative us},
+                set of every module imported)
+    """
+    top_level = {}
+    imported = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.add(name.strip())
+        # Nesting is shown by two spaces of indentation per level after the first space
+        if name.startswith("  "):
+            continue
+        top_level[name.strip()] = top_level.get(name.strip(), 0) + int(cumulative)
+    return sum(top_level.values()), top_level, imported
+
+def measure(code, repeat):
+    """
+    Import an entry point in `repeat` fresh interpreters
+
+    Returns:
+        dict: Median total import time in ms, heaviest top-level imports and lazy modules loaded
+    """
+    totals = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=REPO_DIR, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Import failed for {code!r}:\n{result.stderr[-2000:]}")
+        total, top_level, imported = parse_importtime(result.stderr)
+        totals.append(total)
+
+    heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "median_ms": statistics.median(totals) / 1000,
+        "min_ms": min(totals) / 1000,
+        "heaviest_imports_ms": {name: us / 1000 for name, us in heaviest},
+        "lazy_modules_loaded": sorted(m for m in LAZY_MODULES if m in imported),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreter runs per entry point")
+    parser.add_argument("--entry", action="append", choices=sorted(ENTRY_POINTS), help="Entry point(s) to measure")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Allowed slowdown ratio vs. baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.entry or ENTRY_POINTS:
+        try:
+            results[name] = measure(ENTRY_POINTS[name], args.repeat)
+        except RuntimeError as e:
+            # Missing optional dependencies (e.g. streamlit) should not hide the other results
+            results[name] = {"error": str(e)}
+            print(f"{name:>18}: skipped ({str(e).splitlines()[-1]})")
+            continue
+        print(f"{name:>18}: {results[name]['median_ms']:8.1f} ms  lazy loaded: {results[name]['lazy_modules_loaded']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = []
+        for name, result in results.items():
+            if "error" in result:
+                continue
+            if result["lazy_modules_loaded"]:
+                regressions.append(f"{name} imports {result['lazy_modules_loaded']} at start-up")
+            before = baseline.get(name, {}).get("median_ms")
+            if before and result["median_ms"] > before * args.threshold:
+                regressions.append(f"{name}: {before:.1f} ms -> {result['median_ms']:.1f} ms")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+'''
+Perceptual-hash index to map near-duplicate product images (re-crops,
+recompressions, resized variants) to one canonical image, so tags and
+generations can be reused instead of paying for them again.
+
+'''
+import itertools
+import threading
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+def _to_gray(image):
+    # Accept PIL images or numpy arrays (RGB, RGBA or grayscale)
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("L"))
+    image = np.asarray(image)
+    if image.ndim == 2:
+        return image
+
+    import cv2
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+def phash(image):
+    """
+    Compute a 64-bit DCT perceptual hash
+
+    Args:
+        image (PIL.Image or np.ndarray): Input image
+
+    Returns:
+        int: 64-bit hash, bit set where the low-frequency DCT coefficient is above the median
+    """
+    import cv2
+
+    small = cv2.resize(_to_gray(image), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return _bits_to_int(low > np.median(low))
+
+def dhash(image):
+    """
+    Compute a 64-bit difference hash
+
+    Args:
+        image (PIL.Image or np.ndarray): Input image
+
+    Returns:
+        int: 64-bit hash, bit set where a pixel is brighter than its right neighbour
+    """
+    import cv2
+
+    small = cv2.resize(_to_gray(image), (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+def hamming_distance(hash1, hash2):
+    return bin(hash1 ^ hash2).count("1")
+
+class HashIndex:
+    """
+    Multi-index Hamming lookup over 64-bit perceptual hashes
+
+    Each hash is split into NUM_CHUNKS 16-bit chunks, each with its own table
+    from chunk value to entry ids. Two hashes within distance r must agree on
+    at least one chunk to within r // NUM_CHUNKS bits (pigeonhole), so a query
+    only probes chunk values near its own and verifies those candidates.
+    """
+    NUM_CHUNKS = 4
+    CHUNK_BITS = HASH_BITS // NUM_CHUNKS
+
+    def __init__(self, hash_fn=phash, max_distance=8):
+        self.hash_fn = hash_fn
+        self.max_distance = max_distance
+        self.hashes = []
+        self.keys = []
+        self.tables = [{} for _ in range(self.NUM_CHUNKS)]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _chunks(self, image_hash):
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(image_hash >> (i * self.CHUNK_BITS)) & mask for i in range(self.NUM_CHUNKS)]
+
+    def _neighbours(self, chunk, radius):
+        # All chunk values within `radius` bit flips of `chunk`
+        yield chunk
+        for r in range(1, radius + 1):
+            for bits in itertools.combinations(range(self.CHUNK_BITS), r):
+                flipped = chunk
+                for bit in bits:
+                    flipped ^= 1 << bit
+                yield flipped
+
+    def _add(self, image_hash, key):
+        # Caller holds self.lock
+        entry_id = len(self.keys)
+        self.hashes.append(image_hash)
+        self.keys.append(key)
+        for table, chunk in zip(self.tables, self._chunks(image_hash)):
+            table.setdefault(chunk, []).append(entry_id)
+
+    def add(self, image_hash, key):
+        """
+        Add a hash with the key of the image it belongs to
+
+        Args:
+            image_hash (int): 64-bit perceptual hash
+            key (str): Identifier of the image, e.g. its path or content digest
+        """
+        with self.lock:
+            self._add(image_hash, key)
+
+    def _query(self, image_hash, max_distance):
+        # Caller holds self.lock
+        radius = max_distance // self.NUM_CHUNKS
+        seen = set()
+        matches = []
+        for table, chunk in zip(self.tables, self._chunks(image_hash)):
+            for probe in self._neighbours(chunk, radius):
+                for entry_id in table.get(probe, ()):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    distance = hamming_distance(image_hash, self.hashes[entry_id])
+                    if distance <= max_distance:
+                        matches.append((distance, self.keys[entry_id]))
+        matches.sort()
+        return matches
+
+    def query(self, image_hash, max_distance=None):
+        """
+        Find indexed images within a Hamming distance of a hash
+
+        Args:
+            image_hash (int): 64-bit perceptual hash
+            max_distance (int): Distance threshold, the index default if None
+
+        Returns:
+            list: (distance, key) pairs sorted by distance
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        with self.lock:
+            return self._query(image_hash, max_distance)
+
+    def find_or_add(self, image, key):
+        """
+        Map an image to its canonical image, registering it as canonical if none is close enough
+
+        Args:
+            image (PIL.Image or np.ndarray): Input image
+            key (str): Identifier used if the image becomes canonical
+
+        Returns:
+            tuple: (canonical key, True if the image was newly added)
+        """
+        image_hash = self.hash_fn(image)
+        # Hold the lock across lookup and insert so two concurrent near-duplicates
+        # cannot both become canonical
+        with self.lock:
+            matches = self._query(image_hash, self.max_distance)
+            if matches:
+                return matches[0][1], False
+            self._add(image_hash, key)
+        return key, True
+
+    def save(self, path):
+        """Save the index to a .npz file; keys are stored as strings"""
+        with self.lock:
+            np.savez(path,
+                     hashes=np.array(self.hashes, dtype=np.uint64),
+                     keys=np.array(self.keys, dtype=str),
+                     max_distance=self.max_distance)
+
+    @classmethod
+    def load(cls, path, hash_fn=phash):
+        """Load an index saved with save()"""
+        data = np.load(path)
+        index = cls(hash_fn=hash_fn, max_distance=int(data["max_distance"]))
+        for image_hash, key in zip(data["hashes"].tolist(), data["keys"].tolist()):
+            index.add(image_hash, key)
+        return index
+
+# Example usage
+if __name__ == "__main__":
+    import glob
+
+    index = HashIndex()
+    for image_path in sorted(glob.glob("./images/*.jpg")):
+        image = Image.open(image_path)
+        canonical, is_new = index.find_or_add(image, image_path)
+        # A downscaled, recompressed copy should map back to the same canonical image
+        variant = image.convert("RGB").resize((image.width // 3, image.height // 3))
+        print(f"{image_path}: canonical={canonical}, new={is_new}, "
+              f"variant -> {index.find_or_add(variant, image_path + ':variant')[0]}")
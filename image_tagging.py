@@ -1,9 +1,66 @@
-import boto3
 import base64
 import json
 import io
-from botocore.config import Config
+import sys
 from PIL import Image
+from profiling import profile_run
+
+MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
+
+def max_tokens_for(max_words):
+    # A word is rarely more than 3 tokens; leave a few for punctuation and whitespace
+    return max_words * 3 + 8
+
+def _build_request_body(pil_image, max_words):
+    # Convert PIL image to base64
+    buffered = io.BytesIO()
+    pil_image.save(buffered, format="PNG")
+    image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+    # Prepare the prompt
+    prompt = f"""
+    Look at this image and provide a concise description of the main product shown, using {max_words} words or less.
+    Focus only on identifying the central product.
+    """
+
+    # Prepare the messages with both text and image
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": "image/png",
+                        "data": image_base64
+                    }
+                },
+                {
+                    "type": "text",
+                    "text": prompt
+                }
+            ]
+        }
+    ]
+
+    # Prepare request body for Claude
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens_for(max_words),
+        "messages": messages
+    }
+    return json.dumps(body)
+
+def _bedrock_client():
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-1',
+        config=Config(read_timeout=120)
+    )
 
 def get_product_description(pil_image, max_words=3):
     """
@@ -18,55 +75,12 @@ def get_product_description(pil_image, max_words=3):
     """
     try:
         # Initialize Bedrock runtime client
-        bedrock = boto3.client(
-            service_name='bedrock-runtime',
-            region_name='us-east-1',
-            config=Config(read_timeout=120)
-        )
-
-        # Convert PIL image to base64
-        buffered = io.BytesIO()
-        pil_image.save(buffered, format="PNG")
-        image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-
-        # Prepare the prompt
-        prompt = f"""
-        Look at this image and provide a concise description of the main product shown, using {max_words} words or less.
-        Focus only on identifying the central product.
-        """
-
-        # Prepare the messages with both text and image
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "image/png",
-                            "data": image_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
-            }
-        ]
-
-        # Prepare request body for Claude
-        body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 100,
-            "messages": messages
-        }
+        bedrock = _bedrock_client()
 
         # Invoke Claude model
         response = bedrock.invoke_model(
-            body=json.dumps(body),
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
+            body=_build_request_body(pil_image, max_words),
+            modelId=MODEL_ID,
             accept='application/json',
             contentType='application/json'
         )
@@ -86,11 +100,70 @@ def get_product_description(pil_image, max_words=3):
         print(f"Error generating description: {str(e)}")
         raise
 
+def stream_product_description(pil_image, max_words=3):
+    """
+    Stream a short product description, yielding the text generated so far as it arrives
+
+    The stream is closed as soon as max_words complete words have been received,
+    so no further tokens are generated.
+
+    Args:
+        pil_image (PIL.Image): Input PIL image
+        max_words (int): Maximum number of words in the description
+
+    Yields:
+        str: Description so far, at most max_words words; the last value is the final description
+    """
+    try:
+        # Initialize Bedrock runtime client
+        bedrock = _bedrock_client()
+
+        # Invoke Claude model with a response stream
+        response = bedrock.invoke_model_with_response_stream(
+            body=_build_request_body(pil_image, max_words),
+            modelId=MODEL_ID,
+            accept='application/json',
+            contentType='application/json'
+        )
+
+        stream = response.get('body')
+        text = ""
+        try:
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                message = json.loads(chunk['bytes'])
+                if message.get('type') != 'content_block_delta':
+                    continue
+                text += message['delta'].get('text', '')
+
+                # Stop once max_words words are complete: a further word has
+                # started, or the last one is followed by whitespace
+                words = text.split()
+                if len(words) > max_words or (len(words) == max_words and text[-1:].isspace()):
+                    yield ' '.join(words[:max_words])
+                    return
+                yield text.strip()
+        finally:
+            # Cancel the stream, whether the limit was reached or the caller stopped early
+            if hasattr(stream, 'close'):
+                stream.close()
+
+    except Exception as e:
+        print(f"Error generating description: {str(e)}")
+        raise
+
 if __name__ == "__main__":
-    # Example usage
-    input_image_path = "./images/81T-766EbnL._AC_SL1500_.jpg"
-    image = Image.open(input_image_path)
+    with profile_run("image_tagging"):
+        # Example usage
+        input_image_path = "./images/81T-766EbnL._AC_SL1500_.jpg"
+        image = Image.open(input_image_path)
     
-    # Get product description
-    description = get_product_description(image)
-    print(f"Product description: {description}")
+        # One Claude call: streamed with --stream, else a single response
+        if "--stream" in sys.argv[1:]:
+            for partial in stream_product_description(image):
+                print(f"Streaming: {partial}")
+        else:
+            description = get_product_description(image)
+            print(f"Product description: {description}")
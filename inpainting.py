@@ -1,13 +1,9 @@
-import boto3
 import base64
 import json
-import logging
 from PIL import Image
-import numpy as np
 import io
 import random
-from botocore.config import Config
-from botocore.exceptions import ClientError
+from profiling import profile_run
 
 def inpaint_with_mask_image(pil_image, prompt, mask_image):
     """
@@ -19,6 +15,10 @@ def inpaint_with_mask_image(pil_image, prompt, mask_image):
         mask_image (PIL): The mask image where black (0) indicates areas to inpaint
                          and white (255) indicates areas to keep unchanged
     """
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+
     try:
         # Initialize Bedrock runtime client
         bedrock = boto3.client(
@@ -87,24 +87,25 @@ def inpaint_with_mask_image(pil_image, prompt, mask_image):
         raise
 
 if __name__ == "__main__":
-    # Example usage
-    # Replace with your input image path
-    input_image_path = "./images/81GhOZYLMnL._AC_SL1500_.jpg"
-    mask_image_path = "./images/81GhOZYLMnL._AC_SL1500_mask.png"
+    with profile_run("inpainting"):
+        # Example usage
+        # Replace with your input image path
+        input_image_path = "./images/81GhOZYLMnL._AC_SL1500_.jpg"
+        mask_image_path = "./images/81GhOZYLMnL._AC_SL1500_mask.png"
     
-    # Load input and mask images
-    pil_image = Image.open(input_image_path)
-    mask_image = Image.open(mask_image_path)
+        # Load input and mask images
+        pil_image = Image.open(input_image_path)
+        mask_image = Image.open(mask_image_path)
 
-    # Example prompt
-    prompt = "a red apple"
+        # Example prompt
+        prompt = "a red apple"
 
-    # Generate inpainting
-    result_image = inpaint_with_mask_image(
-        pil_image=pil_image,
-        prompt=prompt,
-        mask_image=mask_image
-    )
+        # Generate inpainting
+        result_image = inpaint_with_mask_image(
+            pil_image=pil_image,
+            prompt=prompt,
+            mask_image=mask_image
+        )
 
-    # Display the result image
-    result_image.show()  # Basic PIL image display
+        # Display the result image
+        result_image.show()  # Basic PIL image display
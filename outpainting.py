@@ -1,23 +1,23 @@
-import boto3
 import base64
 import json
-import logging
 from PIL import Image
-import numpy as np
 import io
 import random
-from botocore.config import Config
-from botocore.exceptions import ClientError
+from profiling import profile_run
+
+def _image_to_base64(pil_image):
+    # Convert PIL image to base64 string
+    buffered = io.BytesIO()
+    pil_image.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode('utf8')
+
+def _outpaint(pil_image, prompt, mask_params):
+    # Shared Nova Canvas OUTPAINTING call; mask_params holds either
+    # {"maskPrompt": ...} or {"maskImage": ...}
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
 
-def outpaint_with_mask_prompt(pil_image, prompt, mask_prompt):
-    """
-    Perform outpainting using Nova Canvas with mask prompt
-    
-    Args:
-        pil_image (PIL): The input image
-        prompt (str): Text prompt describing what to generate
-        mask_prompt (str): Text prompt describing what to mask in the image
-    """
     try:
         # Initialize Bedrock runtime client
         bedrock = boto3.client(
@@ -25,11 +25,6 @@ def outpaint_with_mask_prompt(pil_image, prompt, mask_prompt):
             region_name='us-east-1',
             config=Config(read_timeout=300)
         )
-        
-        # Convert PIL image to base64 string
-        buffered = io.BytesIO()
-        pil_image.save(buffered, format="PNG")
-        input_image = base64.b64encode(buffered.getvalue()).decode('utf8')
 
         # Prepare request body
         request_body = {
@@ -37,8 +32,8 @@ def outpaint_with_mask_prompt(pil_image, prompt, mask_prompt):
             "outPaintingParams": {
                 "text": prompt,
                 "negativeText": "bad quality, blurry, distorted, deformed",
-                "image": input_image,
-                "maskPrompt": mask_prompt,
+                "image": _image_to_base64(pil_image),
+                **mask_params,
                 "outPaintingMode": "PRECISE"
             },
             "imageGenerationConfig": {
@@ -81,22 +76,46 @@ def outpaint_with_mask_prompt(pil_image, prompt, mask_prompt):
         print(f"Error generating image: {str(e)}")
         raise
 
+def outpaint_with_mask_prompt(pil_image, prompt, mask_prompt):
+    """
+    Perform outpainting using Nova Canvas with mask prompt
+    
+    Args:
+        pil_image (PIL): The input image
+        prompt (str): Text prompt describing what to generate
+        mask_prompt (str): Text prompt describing what to mask in the image
+    """
+    return _outpaint(pil_image, prompt, {"maskPrompt": mask_prompt})
+
+def outpaint_with_mask_image(pil_image, prompt, mask_image):
+    """
+    Perform outpainting using Nova Canvas with mask image
+    
+    Args:
+        pil_image (PIL): The input image
+        prompt (str): Text prompt describing what to generate
+        mask_image (PIL): The mask image where black (0) indicates areas to keep
+                         and white (255) indicates areas to outpaint
+    """
+    return _outpaint(pil_image, prompt, {"maskImage": _image_to_base64(mask_image)})
+
 if __name__ == "__main__":
-    # Example usage
-    # Replace with your input image path
-    input_image_path = "./images/81T-766EbnL._AC_SL1500_.jpg"
-    pil_image = Image.open(input_image_path)
+    with profile_run("outpainting"):
+        # Example usage
+        # Replace with your input image path
+        input_image_path = "./images/81T-766EbnL._AC_SL1500_.jpg"
+        pil_image = Image.open(input_image_path)
 
-    # Example prompts
-    prompt = "a beautiful mountain landscape with snow peaks and clear blue sky"
-    mask_prompt = "tv monitor"
+        # Example prompts
+        prompt = "a beautiful mountain landscape with snow peaks and clear blue sky"
+        mask_prompt = "tv monitor"
 
-    # Generate outpainting
-    result_image = outpaint_with_mask_prompt(
-            pil_image=pil_image,  # Fix parameter name
-            prompt=prompt,
-            mask_prompt=mask_prompt
-    )
+        # Generate outpainting
+        result_image = outpaint_with_mask_prompt(
+                pil_image=pil_image,  # Fix parameter name
+                prompt=prompt,
+                mask_prompt=mask_prompt
+        )
 
-    # Display the result image
-    result_image.show()  # Basic PIL image display
+        # Display the result image
+        result_image.show()  # Basic PIL image display
@@ -0,0 +1,333 @@
+'''
+Opt-in profiling for the entry points and app handlers.
+
+Profiling is off unless GENAI_PROFILE is set when a module is imported:
+
+    GENAI_PROFILE=cprofile python inpainting.py     # deterministic, one thread
+    GENAI_PROFILE=sample python inpainting.py       # sampling, all threads
+    GENAI_PROFILE=sample streamlit run vpp-streamlit.py
+
+or, for any script without changes to it:
+
+    python profiling.py --mode sample outpainting.py [script args...]
+
+Each profiled invocation writes to GENAI_PROFILE_DIR (default ./profiles):
+  <name>-<time>-<pid>-<thread>.collapsed    sampled stacks ("a;b;c count"), input for flamegraph.pl / speedscope
+  <name>-<time>-<pid>-<thread>.pstats       cProfile stats (cprofile mode)
+
+The stack sampler runs in both modes, so .collapsed always holds whole stacks;
+cprofile mode adds exact call counts and times in .pstats.
+  <name>-<time>-<pid>-<thread>.alloc.txt    top-N allocation sites from tracemalloc (GENAI_PROFILE_TOP, default 25)
+
+Sessions are tracked per thread: every thread (a Streamlit rerun, a tagging
+worker, another browser session) can run its own session at the same time, and
+a session started inside another one on the same thread is not profiled
+separately. cProfile runs per thread; the stack sampler and tracemalloc are
+shared by all active sessions and stop when the last one finishes, so the
+allocation report and peak are process-wide.
+
+When GENAI_PROFILE is unset, profiled() returns the function unchanged and
+start() returns None, so there is no overhead.
+
+'''
+import functools
+import marshal
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = "GENAI_PROFILE"
+PROFILE_DIR_ENV = "GENAI_PROFILE_DIR"
+PROFILE_TOP_ENV = "GENAI_PROFILE_TOP"
+PROFILE_INTERVAL_ENV = "GENAI_PROFILE_INTERVAL_MS"
+MODES = ("cprofile", "sample")
+
+# Thread ident -> the session running on that thread
+_sessions = {}
+_lock = threading.Lock()
+
+# Process-wide resources shared by the active sessions, guarded by _lock
+_sampler = None
+_sampler_users = 0
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+def profile_mode():
+    """Return the active profiling mode, or None when profiling is off"""
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if not mode or mode in ("0", "off", "false"):
+        return None
+    if mode not in MODES:
+        raise ValueError(f"{PROFILE_ENV} must be one of {MODES}, got {mode!r}")
+    return mode
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class _Sampler(threading.Thread):
+    """Background thread that samples thread stacks for every subscribed session"""
+
+    def __init__(self, interval):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.sessions = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            with _lock:
+                sessions = list(self.sessions)
+            stacks = {}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                for session in sessions:
+                    if not session.samples(thread_id):
+                        continue
+                    if thread_id not in stacks:
+                        stack = []
+                        while frame is not None:
+                            stack.append(_frame_label(frame))
+                            frame = frame.f_back
+                        stacks[thread_id] = ";".join(reversed(stack))
+                    key = stacks[thread_id]
+                    session.counts[key] = session.counts.get(key, 0) + 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def _subscribe_sampler(session):
+    # Caller holds _lock
+    global _sampler, _sampler_users
+
+    if _sampler is None:
+        _sampler = _Sampler(float(os.environ.get(PROFILE_INTERVAL_ENV, "5")) / 1000)
+        _sampler.start()
+    _sampler.sessions.append(session)
+    _sampler_users += 1
+
+def _unsubscribe_sampler(session):
+    # Caller holds _lock; returns the sampler to stop once nobody uses it
+    global _sampler, _sampler_users
+
+    _sampler.sessions.remove(session)
+    _sampler_users -= 1
+    if _sampler_users:
+        return None
+    sampler, _sampler = _sampler, None
+    return sampler
+
+def _acquire_tracemalloc():
+    # Caller holds _lock
+    global _tracemalloc_users, _tracemalloc_owned
+    import tracemalloc
+
+    if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _tracemalloc_owned = True
+    _tracemalloc_users += 1
+
+def _release_tracemalloc():
+    # Caller holds _lock; tracing stops with the last session, if a session started it
+    global _tracemalloc_users, _tracemalloc_owned
+    import tracemalloc
+
+    _tracemalloc_users -= 1
+    if _tracemalloc_users == 0 and _tracemalloc_owned:
+        tracemalloc.stop()
+        _tracemalloc_owned = False
+
+class ProfileSession:
+    """
+    One profiled invocation on one thread; created by start(), finished by stop()
+
+    Every session subscribes to the shared stack sampler, which records its
+    thread (or every thread in the process for all_threads sessions). In
+    cprofile mode the thread also runs its own cProfile profiler; if that is not
+    possible (Python 3.12+ allows only one active cProfile per process), the
+    session keeps only the sampled stacks.
+    """
+
+    def __init__(self, name, mode, all_threads=False):
+        import tracemalloc
+
+        self.name = name
+        self.mode = mode
+        self.thread = threading.current_thread()
+        self.all_threads = all_threads
+        self.output_dir = os.environ.get(PROFILE_DIR_ENV, "profiles")
+        self.top = int(os.environ.get(PROFILE_TOP_ENV, "25"))
+        self.started = time.time()
+        self.counts = {}
+        self.profiler = None
+        self.finished = False
+        if mode == "cprofile":
+            import cProfile
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self.profiler = profiler
+            except ValueError:
+                self.mode = "sample"
+        with _lock:
+            _acquire_tracemalloc()
+            _subscribe_sampler(self)
+        self.start_memory = tracemalloc.get_traced_memory()[0]
+
+    def samples(self, thread_id):
+        """Whether the sampler should record the stack of a thread for this session"""
+        return self.all_threads or thread_id == self.thread.ident
+
+    def finish(self):
+        import tracemalloc
+
+        with _lock:
+            if self.finished:
+                return None
+            self.finished = True
+        # Before Python 3.12 disable() detaches whatever profiler the *calling*
+        # thread runs, so it is only called from the session's own thread; a
+        # session stopped from elsewhere reads its stats without disabling
+        if self.profiler is not None and (self.thread is threading.current_thread() or sys.version_info >= (3, 12)):
+            self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        sampler = None
+        with _lock:
+            sampler = _unsubscribe_sampler(self)
+            _release_tracemalloc()
+        if sampler is not None:
+            sampler.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started)) + f"{self.started % 1:.3f}"[1:]
+        stem = os.path.join(self.output_dir, f"{self.name}-{timestamp}-{os.getpid()}-{self.thread.native_id}")
+
+        if self.mode == "cprofile":
+            # snapshot_stats() rather than dump_stats(), which would call disable()
+            self.profiler.snapshot_stats()
+            with open(stem + ".pstats", "wb") as f:
+                marshal.dump(self.profiler.stats, f)
+        collapsed = [f"{stack} {count}" for stack, count in self.counts.items()]
+        with open(stem + ".collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed) + "\n")
+
+        with open(stem + ".alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"{self.name} ({self.thread.name}): {time.time() - self.started:.3f}s, traced memory "
+                    f"{self.start_memory / 2**20:.1f} MB at start, {current / 2**20:.1f} MB at end, "
+                    f"process-wide peak {peak / 2**20:.1f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                f.write(f"{stat}\n")
+        print(f"Profile written to {stem}.*", file=sys.stderr)
+        return stem
+
+def _stale_sessions():
+    # Caller holds _lock; sessions whose thread exited without stopping them
+    return [_sessions.pop(ident) for ident, session in list(_sessions.items())
+            if session is not None and not session.thread.is_alive()]
+
+def start(name, all_threads=False):
+    """
+    Start profiling one invocation on the current thread
+
+    Returns None (and does nothing) when profiling is off or the current thread
+    already runs a session. Sessions left behind by threads that have exited
+    are finished first.
+
+    Args:
+        name (str): Name used for the report files
+        all_threads (bool): Sample every thread rather than only the current one
+    """
+    mode = profile_mode()
+    if mode is None:
+        return None
+    ident = threading.get_ident()
+    with _lock:
+        stale = _stale_sessions()
+        running = ident in _sessions
+        if not running:
+            _sessions[ident] = None  # Reserve the slot while the session starts
+    for session in stale:
+        session.finish()
+    if running:
+        return None
+    try:
+        session = ProfileSession(name, mode, all_threads)
+    except BaseException:
+        with _lock:
+            _sessions.pop(ident, None)
+        raise
+    with _lock:
+        _sessions[ident] = session
+    return session
+
+def stop(session):
+    """
+    Finish a session returned by start() and write its reports
+
+    May be called from any thread, e.g. to clean up a session whose invocation
+    was interrupted; finishing a session twice does nothing.
+    """
+    if session is None:
+        return None
+    with _lock:
+        if _sessions.get(session.thread.ident) is session:
+            del _sessions[session.thread.ident]
+    return session.finish()
+
+@contextmanager
+def profile_run(name, all_threads=False):
+    """Profile the enclosed block as one invocation when profiling is on"""
+    session = start(name, all_threads)
+    try:
+        yield session
+    finally:
+        stop(session)
+
+def profiled(name=None):
+    """
+    Decorator that profiles every call of a function when profiling is on
+
+    The environment is checked once, at decoration time: with profiling off
+    the function is returned as-is.
+    """
+    def decorate(func):
+        if profile_mode() is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_run(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+if __name__ == "__main__":
+    import argparse
+    import runpy
+
+    parser = argparse.ArgumentParser(description="Run a script under the profiler")
+    parser.add_argument("--mode", choices=MODES, default="sample")
+    parser.add_argument("--output-dir", help=f"Report directory (default ${PROFILE_DIR_ENV} or ./profiles)")
+    parser.add_argument("script", help="Script to run, e.g. inpainting.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments passed to the script")
+    cli_args = parser.parse_args()
+
+    os.environ[PROFILE_ENV] = cli_args.mode
+    if cli_args.output_dir:
+        os.environ[PROFILE_DIR_ENV] = cli_args.output_dir
+    sys.argv = [cli_args.script] + cli_args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(cli_args.script)))
+
+    # Share session state with scripts that import this module themselves
+    import profiling
+
+    name = os.path.splitext(os.path.basename(cli_args.script))[0]
+    with profiling.profile_run(name, all_threads=True):
+        runpy.run_path(cli_args.script, run_name="__main__")
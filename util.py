@@ -1,6 +1,10 @@
-import cv2
+import hashlib
 import math
+import threading
 import numpy as np
+from collections import OrderedDict
+from PIL import Image
+from mask_generation import create_mask_from_regions
 
 def rotation(x1, y1, angle, width, height):
     # Convert angle to radians
@@ -41,10 +45,16 @@ def rotation(x1, y1, angle, width, height):
         (int(x1 + x4_rot), int(y1 + y4_rot))   # bottom-left
     ]
 
-def homography_transform(product_img, canvas_img, coordinates):
-    # Convert PIL image to OpenCV format
-    product_img_cv = np.array(product_img)
-    canvas_img_cv = np.array(canvas_img)
+def homography_transform(product_img, canvas_img, coordinates, mask=None):
+    import cv2
+
+    # Convert PIL image to OpenCV format. NumPy inputs are used without copying:
+    # a writable, contiguous canvas array is warped into in place
+    product_img_cv = np.asarray(product_img)
+    if isinstance(canvas_img, np.ndarray) and canvas_img.flags.writeable and canvas_img.flags.c_contiguous:
+        canvas_img_cv = canvas_img
+    else:
+        canvas_img_cv = np.array(canvas_img)
 
     # Get the size of the product image
     h, w = product_img_cv.shape[:2]
@@ -68,4 +78,145 @@ def homography_transform(product_img, canvas_img, coordinates):
                                 dst=canvas_img_cv, 
                                 borderMode=cv2.BORDER_TRANSPARENT)
 
+    # Rasterize the placed quad into the mask (black = product) as a by-product of placement
+    if mask is not None:
+        create_mask_from_regions((canvas_img_cv.shape[1], canvas_img_cv.shape[0]), polygons=[coordinates], mask=mask)
+
     return warped
+
+class MemoryBudget:
+    """
+    Bytes held by one app session against a fixed budget, and the peak reached
+
+    Callers reserve() the size of a buffer before allocating it and release() it
+    once the buffer is no longer referenced. A reservation that would exceed the
+    budget raises MemoryError instead, so nothing is allocated. Thread-safe.
+
+    Args:
+        budget_bytes (int): Maximum bytes reserved at any time
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.in_use_bytes = 0
+        self.peak_bytes = 0
+        self.lock = threading.Lock()
+
+    def reserve(self, nbytes):
+        """Reserve nbytes, raising MemoryError if the budget would be exceeded"""
+        with self.lock:
+            if self.in_use_bytes + nbytes > self.budget_bytes:
+                raise MemoryError(f"Memory budget of {self.budget_bytes / 2**20:.1f} MB exceeded "
+                                  f"({self.in_use_bytes / 2**20:.1f} MB in use, {nbytes / 2**20:.1f} MB requested)")
+            self.in_use_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self.in_use_bytes)
+
+    def release(self, nbytes):
+        """Return nbytes reserved earlier"""
+        with self.lock:
+            self.in_use_bytes -= nbytes
+
+    def report(self):
+        """Current, peak and budget bytes as a short string"""
+        return (f"{self.in_use_bytes / 2**20:.1f} MB in use, peak {self.peak_bytes / 2**20:.1f} MB, "
+                f"budget {self.budget_bytes / 2**20:.1f} MB")
+
+# Cache of resized product renditions, keyed by (product digest, size, resample),
+# bounded by the total bytes of the cached arrays; Gradio calls handlers from
+# several threads, so every access goes through the lock
+RESIZE_CACHE_BYTES = 64 * 2**20
+_resize_cache = OrderedDict()
+_resize_cache_bytes = 0
+_resize_cache_lock = threading.Lock()
+
+def image_digest(image_np):
+    # Identify an image by its shape and a digest of its pixel buffer
+    image_np = np.ascontiguousarray(image_np)
+    digest = hashlib.blake2b(memoryview(image_np).cast("B"), digest_size=16).hexdigest()
+    return f"{image_np.shape}:{image_np.dtype}:{digest}"
+
+def to_rgb_array(image_np):
+    # Normalize grayscale / RGBA arrays to 3-channel RGB uint8
+    image_np = np.asarray(image_np)
+    if image_np.ndim == 2:
+        return np.stack([image_np] * 3, axis=-1)
+    if image_np.shape[2] == 4:
+        return image_np[:, :, :3]
+    return image_np
+
+def resize_product(product_np, size, resample=Image.Resampling.BICUBIC, product_key=None):
+    """
+    Resize a product image to size, reusing a cached rendition when the same
+    product was already resized to the same size with the same filter
+
+    Args:
+        product_np (np.ndarray): Product image as an RGB array
+        size (tuple): Target size (width, height)
+        resample (int): PIL resampling filter
+        product_key (str): Precomputed product digest, computed if None
+
+    Returns:
+        np.ndarray: Resized product image of shape (height, width, 3)
+    """
+    if product_key is None:
+        product_key = image_digest(product_np)
+    global _resize_cache_bytes
+
+    key = (product_key, tuple(size), resample)
+    with _resize_cache_lock:
+        resized = _resize_cache.get(key)
+        if resized is not None:
+            _resize_cache.move_to_end(key)
+            return resized
+
+    resized = np.asarray(Image.fromarray(to_rgb_array(product_np)).resize(tuple(size), resample))
+    # Renditions larger than the whole budget are returned without caching
+    if resized.nbytes > RESIZE_CACHE_BYTES:
+        return resized
+    with _resize_cache_lock:
+        if key not in _resize_cache:
+            _resize_cache[key] = resized
+            _resize_cache_bytes += resized.nbytes
+        while _resize_cache_bytes > RESIZE_CACHE_BYTES:
+            _, evicted = _resize_cache.popitem(last=False)
+            _resize_cache_bytes -= evicted.nbytes
+    return resized
+
+def place_products(canvas_np, products, boxes, resample=Image.Resampling.BICUBIC):
+    """
+    Paste products into axis-aligned boxes of a preallocated canvas in place
+
+    Args:
+        canvas_np (np.ndarray): RGB canvas of shape (height, width, 3), modified in place
+        products (np.ndarray or list): A single product image used for every box,
+                                       or one product image per box
+        boxes (list): Bounding boxes (x1, y1, x2, y2)
+        resample (int): PIL resampling filter
+
+    Returns:
+        np.ndarray: The canvas with all products placed
+    """
+    if isinstance(products, np.ndarray):
+        products = [products] * len(boxes)
+    if len(products) != len(boxes):
+        raise ValueError(f"Got {len(products)} products for {len(boxes)} boxes")
+
+    # Digest each distinct product once, not once per box
+    keys = {}
+    canvas_h, canvas_w = canvas_np.shape[:2]
+    for product_np, box in zip(products, boxes):
+        x1, y1, x2, y2 = (int(v) for v in box)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        if id(product_np) not in keys:
+            keys[id(product_np)] = image_digest(product_np)
+        resized = resize_product(product_np, (x2 - x1, y2 - y1), resample, keys[id(product_np)])
+
+        # Clip the box to the canvas and write the visible part with one slice assignment
+        cx1, cy1 = max(x1, 0), max(y1, 0)
+        cx2, cy2 = min(x2, canvas_w), min(y2, canvas_h)
+        if cx2 <= cx1 or cy2 <= cy1:
+            continue
+        canvas_np[cy1:cy2, cx1:cx2] = resized[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1]
+
+    return canvas_np
@@ -2,12 +2,28 @@
 Use Bedrock Data Automation to analyze a video.
 
 '''
-import boto3
 import os
+import io
 import json
-from botocore.exceptions import ClientError
+import base64
+import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time
+from profiling import profiled
+
+POLL_INTERVAL = 10  # Seconds between job status checks
+
+DEFAULT_BUCKET = "testing-video-01242025"  # Replace with your S3 bucket name
+DEFAULT_S3_KEY = "sample-video/2U_ulXkfXqQ.mp4"
+UPLOAD_PREFIX = "sample-video/"  # Local videos are uploaded to <prefix><etag>/<file name>
+
+# Multipart upload defaults; S3 needs parts of at least 5 MiB and at most 10,000 parts
+PART_SIZE = 64 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+UPLOAD_WORKERS = 8
 
 def read_json_from_s3(bucket_name, file_key):
     """
@@ -20,6 +36,8 @@ def read_json_from_s3(bucket_name, file_key):
     Returns:
         dict: Contents of the JSON file
     """
+    import boto3
+
     try:
         # Create an S3 client
         s3_client = boto3.client('s3', region_name='us-west-2')  # Replace with your region
@@ -62,8 +80,155 @@ def parse_s3_uri(s3_uri):
 
     return bucket_name, file_key
 
+class _SliceReader(io.RawIOBase):
+    """Seekable read-only file object over a memoryview, so parts are sent without copying the file"""
+
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: len(self.view)}[whence]
+        self.pos = max(0, base + offset)
+        return self.pos
+
+    def readinto(self, buffer):
+        n = max(0, min(len(buffer), len(self.view) - self.pos))
+        buffer[:n] = self.view[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+def _part_ranges(size, part_size):
+    # Grow the part size if the file would need more than MAX_PARTS parts
+    part_size = max(part_size, MIN_PART_SIZE, -(-size // MAX_PARTS))
+    return [(start, min(start + part_size, size)) for start in range(0, size, part_size)] or [(0, 0)]
+
+def _multipart_etag(part_digests):
+    # S3's ETag for a multipart object: MD5 of the concatenated part MD5s, then "-<part count>"
+    if len(part_digests) == 1:
+        return part_digests[0].hex()
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+def upload_video_to_s3(s3_client, local_path, bucket_name, s3_key, part_size=PART_SIZE, max_workers=UPLOAD_WORKERS):
+    """
+    Upload a local file to S3 with concurrent multipart upload, skipping it if an identical object exists
+
+    The file is memory-mapped and each part is read through a memoryview slice.
+    Part MD5s are computed up front (in parallel) to derive the object's ETag,
+    which is compared with the existing object before anything is uploaded.
+
+    Parameters:
+        s3_client: boto3 S3 client
+        local_path (str): Path to the local file
+        bucket_name (str): Destination bucket
+        s3_key (str): Destination key
+        part_size (int): Bytes per part (raised to S3's minimum and to fit 10,000 parts)
+        max_workers (int): Number of parts uploaded concurrently
+
+    Returns:
+        bool: True if the file was uploaded, False if a matching object was already present
+    """
+    return _upload_video(s3_client, local_path, bucket_name, lambda etag: s3_key, part_size, max_workers)[0]
+
+def upload_video_by_content(s3_client, local_path, bucket_name, prefix=UPLOAD_PREFIX, part_size=PART_SIZE,
+                            max_workers=UPLOAD_WORKERS):
+    """
+    Upload a local file to S3 under a key derived from its content
+
+    The key is <prefix><etag>/<file name>, where etag is the object's S3 ETag,
+    so different files with the same name never overwrite each other and an
+    unchanged file maps to the object already uploaded.
+
+    Parameters:
+        s3_client: boto3 S3 client
+        local_path (str): Path to the local file
+        bucket_name (str): Destination bucket
+        prefix (str): Key prefix
+        part_size (int): Bytes per part (raised to S3's minimum and to fit 10,000 parts)
+        max_workers (int): Number of parts uploaded concurrently
+
+    Returns:
+        str: The S3 key of the object
+    """
+    def make_key(etag):
+        return f"{prefix}{etag}/{os.path.basename(local_path)}"
+
+    return _upload_video(s3_client, local_path, bucket_name, make_key, part_size, max_workers)[1]
+
+def _upload_video(s3_client, local_path, bucket_name, make_key, part_size, max_workers):
+    # Shared by upload_video_to_s3 and upload_video_by_content; make_key maps the
+    # computed ETag to the destination key. Returns (uploaded, s3_key).
+    from botocore.exceptions import ClientError
+
+    size = os.path.getsize(local_path)
+    with open(local_path, 'rb') as f, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        view = memoryview(mapped)
+        try:
+            ranges = _part_ranges(size, part_size)
+            # hashlib releases the GIL on large buffers, so parts are hashed in parallel
+            digests = list(executor.map(lambda r: hashlib.md5(view[r[0]:r[1]]).digest(), ranges))
+            etag = _multipart_etag(digests)
+            s3_key = make_key(etag)
+
+            # Skip the upload when the object already has the same content
+            try:
+                head = s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+                if head.get('ETag', '').strip('"') == etag or head.get('Metadata', {}).get('source-etag') == etag:
+                    print(f"s3://{bucket_name}/{s3_key} is up to date, skipping upload")
+                    return False, s3_key
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') not in ('404', 'NoSuchKey', 'NotFound'):
+                    raise
+
+            metadata = {'source-etag': etag}
+            if len(ranges) == 1:
+                s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=_SliceReader(view), ContentLength=size,
+                                     ContentMD5=base64.b64encode(digests[0]).decode('ascii'), Metadata=metadata)
+                return True, s3_key
+
+            upload_id = s3_client.create_multipart_upload(Bucket=bucket_name, Key=s3_key, Metadata=metadata)['UploadId']
+            print(f"Uploading {local_path} to s3://{bucket_name}/{s3_key} in {len(ranges)} parts")
+
+            def upload_part(part_number):
+                start, end = ranges[part_number - 1]
+                response = s3_client.upload_part(
+                    Bucket=bucket_name, Key=s3_key, UploadId=upload_id, PartNumber=part_number,
+                    Body=_SliceReader(view[start:end]), ContentLength=end - start,
+                    ContentMD5=base64.b64encode(digests[part_number - 1]).decode('ascii')
+                )
+                return {'ETag': response['ETag'], 'PartNumber': part_number}
+
+            try:
+                parts = list(executor.map(upload_part, range(1, len(ranges) + 1)))
+                s3_client.complete_multipart_upload(
+                    Bucket=bucket_name, Key=s3_key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+                )
+            except Exception:
+                s3_client.abort_multipart_upload(Bucket=bucket_name, Key=s3_key, UploadId=upload_id)
+                raise
+            return True, s3_key
+        finally:
+            view.release()
+            if size:
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass  # A part body is still referenced; the map is closed when it is collected
+
 def get_or_create_project(client):
     """Get existing project or create a new one"""
+    from botocore.exceptions import ClientError
+
     try:
         response = client.create_data_automation_project(
             projectName=f"video-analysis-job-{int(time.time())}",
@@ -91,16 +256,46 @@ def get_or_create_project(client):
         print(f"Error creating project: {e}")
         raise
 
-def analyze_video(runtime_client, project_arn):
-    """Analyze a video using BDA"""
+def analyze_video(runtime_client, project_arn, video_path=None, bucket_name=DEFAULT_BUCKET,
+                  part_size=PART_SIZE, max_workers=UPLOAD_WORKERS, s3_key=None):
+    """
+    Analyze a video using BDA
+
+    Parameters:
+        runtime_client: Bedrock Data Automation runtime client
+        project_arn (str): ARN of the BDA project
+        video_path (str): Local video path to upload, or an s3:// URI of an existing object;
+                          the sample video in bucket_name if None
+        bucket_name (str): Bucket for uploads and analysis output
+        part_size (int): Multipart upload part size in bytes
+        max_workers (int): Number of parts uploaded concurrently
+        s3_key (str): Key to upload a local video to; by default a key under UPLOAD_PREFIX
+                      derived from the video's content
+
+    Returns:
+        dict: Standard output of the analysis
+    """
+    import boto3
+    from botocore.exceptions import ClientError
+
     try:
         # First, upload the video to S3
-        bucket_name = "testing-video-01242025"  # Replace with your S3 bucket name
-        s3_key = "sample-video/2U_ulXkfXqQ.mp4"
+        if video_path is None:
+            s3_uri = f"s3://{bucket_name}/{DEFAULT_S3_KEY}"
+        elif video_path.startswith("s3://"):
+            s3_uri = video_path
+        else:
+            s3_client = boto3.client('s3', region_name='us-west-2')  # Replace with your region
+            if s3_key is None:
+                s3_key = upload_video_by_content(s3_client, video_path, bucket_name, UPLOAD_PREFIX, part_size,
+                                                 max_workers)
+            else:
+                upload_video_to_s3(s3_client, video_path, bucket_name, s3_key, part_size, max_workers)
+            s3_uri = f"s3://{bucket_name}/{s3_key}"
 
         # Configure input and output
         input_config = {
-            "s3Uri": f"s3://{bucket_name}/{s3_key}"
+            "s3Uri": s3_uri
         }
 
         output_config = {
@@ -153,13 +348,16 @@ def analyze_video(runtime_client, project_arn):
                 error_code = status_response.get('errorCode', 'No error code provided')
                 raise Exception(f"Job failed with status: {status}, Error Code: {error_code}, Message: {error_message}")
 
-            time.sleep(10)  # Wait 10 seconds before checking again
+            time.sleep(POLL_INTERVAL)  # Wait before checking again
 
     except ClientError as e:
         print(f"Error analyzing video: {e}")
         raise
 
+@profiled("video_analysis")
 def main():
+    import boto3
+
     # Initialize BDA clients
     bda_client = boto3.client('bedrock-data-automation', region_name='us-west-2')
     bda_runtime_client = boto3.client('bedrock-data-automation-runtime', region_name='us-west-2')
@@ -167,6 +365,9 @@ def main():
     # Output path for metadata.json
     output_path = "video_metadata.json"
 
+    # Local video or s3:// URI to analyze; None analyzes the sample video already in S3
+    video_path = None
+
     try:
         # Get or create a BDA project
         project_arn = get_or_create_project(bda_client)
@@ -174,7 +375,7 @@ def main():
 
         # Analyze the video and get results directly
         print("Starting video analysis...")
-        video_metadata = analyze_video(bda_runtime_client, project_arn)
+        video_metadata = analyze_video(bda_runtime_client, project_arn, video_path=video_path)
         print(video_metadata)
 
         # Save results to metadata.json
@@ -1,45 +1,49 @@
-import boto3
 import base64
-from PIL import Image
+from PIL import Image, ImageOps
 import io
+import os
 import json
 import time
 import random
+import shutil
+import subprocess
+import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from profiling import profile_run
 
-def generate_video_from_image(image: Image.Image, prompt: str, output_path: str):
+# temp variables
+S3_DESTINATION_BUCKET = "video-gen"
+MODEL_ID = "amazon.nova-reel-v1:0"
+SLEEP_TIME = 30
+VIDEO_SIZE = (1280, 720)
+
+def fit_image(image: Image.Image, size=VIDEO_SIZE, fit="letterbox"):
     """
-    Generate a video using Amazon Nova Reel from a reference image and text prompt
-    
+    Fit an image to the video size without distorting it
+
     Args:
-        image (PIL.Image): Input reference image
-        prompt (str): Text prompt describing the desired video
-        output_path (str): Path to save the output video
-    
+        image (PIL.Image): Input image
+        size (tuple): Target size (width, height)
+        fit (str): "letterbox" pads with black bars, "crop" center-crops to fill
+
     Returns:
-        bool: True if video generation was successful
+        PIL.Image: RGB image of exactly `size`
     """
-    # Resize PIL image
-    image = image.resize((1280, 720), Image.Resampling.LANCZOS)
+    image = image.convert("RGB")
+    if fit == "letterbox":
+        return ImageOps.pad(image, size, Image.Resampling.LANCZOS, color=(0, 0, 0))
+    if fit == "crop":
+        return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    raise ValueError(f"Unknown fit mode: {fit}")
 
+def _model_input(image, prompt):
     # Convert PIL image to base64
     buffered = io.BytesIO()
     image.save(buffered, format="PNG")
     image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
 
-    # Create Bedrock Runtime client
-    bedrock = boto3.client(
-        service_name='bedrock-runtime',
-        region_name='us-east-1'  # Nova Reel is available in us-east-1
-    )
-
-    # temp variables
-    S3_DESTINATION_BUCKET = "video-gen"
-    MODEL_ID = "amazon.nova-reel-v1:0"
-    SLEEP_TIME = 30
-
-    # Prepare model input
-    model_input = {
+    return {
         "taskType": "TEXT_VIDEO",
         "textToVideoParams": {
             "text": prompt,
@@ -48,10 +52,37 @@ def generate_video_from_image(image: Image.Image, prompt: str, output_path: str)
         "videoGenerationConfig": {
             "durationSeconds": 6,
             "fps": 24,
-            "dimension": "1280x720",
+            "dimension": f"{VIDEO_SIZE[0]}x{VIDEO_SIZE[1]}",
             "seed": random.randint(0, 2147483648)
         }
     }
+
+def generate_video_from_image(image: Image.Image, prompt: str, output_path: str, fit: str = "letterbox"):
+    """
+    Generate a video using Amazon Nova Reel from a reference image and text prompt
+    
+    Args:
+        image (PIL.Image): Input reference image
+        prompt (str): Text prompt describing the desired video
+        output_path (str): Path to save the output video
+        fit (str): How to fit the image to 1280x720, "letterbox" or "crop"
+    
+    Returns:
+        bool: True if video generation was successful
+    """
+    import boto3
+
+    # Fit PIL image to the video size, preserving its aspect ratio
+    image = fit_image(image, VIDEO_SIZE, fit)
+
+    # Create Bedrock Runtime client
+    bedrock = boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-1'  # Nova Reel is available in us-east-1
+    )
+
+    # Prepare model input
+    model_input = _model_input(image, prompt)
     
     invocation = bedrock.start_async_invoke(
         modelId=MODEL_ID,
@@ -94,19 +125,187 @@ def generate_video_from_image(image: Image.Image, prompt: str, output_path: str)
     
     return video_bytes
 
+def _ffmpeg():
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required to concatenate storyboard clips")
+    return ffmpeg
+
+class ClipStream:
+    """
+    Concatenate clips into one video while later clips are still being generated
+
+    One ffmpeg process muxes an MPEG-TS stream read from its stdin into
+    output_path. Each appended clip is remuxed to MPEG-TS with stream copy and
+    piped into it, so clips are written in order as soon as each is available
+    and nothing is re-encoded.
+
+    Args:
+        output_path (str): Path to save the concatenated video
+    """
+
+    def __init__(self, output_path):
+        self.ffmpeg = _ffmpeg()
+        self.output_path = output_path
+        self.muxer = subprocess.Popen(
+            [self.ffmpeg, "-y", "-loglevel", "error", "-f", "mpegts", "-i", "pipe:0",
+             "-c", "copy", "-bsf:a", "aac_adtstoasc", output_path],
+            stdin=subprocess.PIPE
+        )
+
+    def append(self, clip_path):
+        """Append one clip; returns once it has been handed to the muxer"""
+        subprocess.run(
+            [self.ffmpeg, "-loglevel", "error", "-i", clip_path, "-c", "copy",
+             "-bsf:v", "h264_mp4toannexb", "-f", "mpegts", "pipe:1"],
+            stdout=self.muxer.stdin, check=True
+        )
+
+    def close(self):
+        """Finish the output file"""
+        self.muxer.stdin.close()
+        if self.muxer.wait() != 0:
+            raise subprocess.CalledProcessError(self.muxer.returncode, self.muxer.args)
+
+    def abort(self):
+        """Stop muxing and remove the partial output"""
+        self.muxer.kill()
+        self.muxer.wait()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+def generate_storyboard(shots, output_path=None, fit="letterbox", max_workers=8):
+    """
+    Generate a multi-shot video with Amazon Nova Reel, one 6-second clip per shot
+
+    All shots are preprocessed and submitted concurrently, and each clip is
+    downloaded as soon as its job completes, so the wall time approaches that of
+    the slowest shot rather than the sum over shots. Clips are appended to the
+    output in shot order as soon as the next one is downloaded (see ClipStream).
+
+    If a shot fails, the error names it and the invocation ARNs of the shots
+    still running, which are also printed; those jobs are not waited for.
+
+    Args:
+        shots (list): (PIL.Image, prompt) pairs, in playback order
+        output_path (str): Path to save the concatenated video; if None the clips
+                           are left in a temporary directory and their paths returned
+        fit (str): How to fit each image to 1280x720, "letterbox" or "crop"
+        max_workers (int): Threads used to submit shots and download clips
+
+    Returns:
+        str or list: output_path, or the clip paths in shot order if output_path is None
+    """
+    import boto3
+
+    bedrock = boto3.client(
+        service_name='bedrock-runtime',
+        region_name='us-east-1'  # Nova Reel is available in us-east-1
+    )
+    s3_client = boto3.client("s3")
+
+    def submit(shot):
+        image, prompt = shot
+        invocation = bedrock.start_async_invoke(
+            modelId=MODEL_ID,
+            modelInput=_model_input(fit_image(image, VIDEO_SIZE, fit), prompt),
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{S3_DESTINATION_BUCKET}"}}
+        )
+        return invocation["invocationArn"]
+
+    clip_dir = tempfile.mkdtemp(prefix="storyboard-")
+    clip_paths = [os.path.join(clip_dir, f"shot-{index:03d}.mp4") for index in range(len(shots))]
+    stream = ClipStream(output_path) if output_path is not None else None
+    pending = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Preprocess and submit every shot concurrently; jobs that started are
+            # tracked even if another submission failed, so they can be reported
+            submissions = [executor.submit(submit, shot) for shot in shots]
+            for index, submission in enumerate(submissions):
+                if submission.exception() is None:
+                    pending[submission.result()] = index
+            for submission in submissions:
+                submission.result()
+            print(f"Submitted {len(pending)} shots")
+
+            # Poll all outstanding jobs, start each download as soon as its job
+            # completes and append downloaded clips to the output in shot order
+            downloads = {}
+            next_clip = 0
+            while pending:
+                failed = []
+                for invocation_arn, index in list(pending.items()):
+                    status = bedrock.get_async_invoke(invocationArn=invocation_arn)["status"]
+                    if status == "InProgress":
+                        continue
+                    del pending[invocation_arn]
+                    if status != "Completed":
+                        failed.append(f"shot {index} ({status}): {invocation_arn}")
+                        continue
+                    s3_prefix = invocation_arn.split('/')[-1]
+                    print(f"Shot {index} is ready, {len(pending)} still in progress")
+                    downloads[index] = executor.submit(
+                        s3_client.download_file, S3_DESTINATION_BUCKET, f"{s3_prefix}/output.mp4", clip_paths[index]
+                    )
+                if failed:
+                    raise RuntimeError(f"Storyboard failed: {'; '.join(failed)}; "
+                                       f"still running: {sorted(pending) or 'none'}")
+
+                while next_clip in downloads and downloads[next_clip].done():
+                    downloads[next_clip].result()
+                    if stream is not None:
+                        stream.append(clip_paths[next_clip])
+                    next_clip += 1
+                if pending:
+                    time.sleep(SLEEP_TIME)
+
+            for index in range(next_clip, len(shots)):
+                downloads[index].result()
+                if stream is not None:
+                    stream.append(clip_paths[index])
+
+        if stream is None:
+            return clip_paths
+        stream.close()
+        print(f"\nStoryboard is saved at {output_path}")
+        shutil.rmtree(clip_dir, ignore_errors=True)
+        return output_path
+    except BaseException:
+        if pending:
+            print(f"Storyboard stopped with {len(pending)} Nova Reel jobs still running:")
+            for invocation_arn, index in sorted(pending.items(), key=lambda item: item[1]):
+                print(f"  shot {index}: {invocation_arn}")
+        if stream is not None:
+            stream.abort()
+        shutil.rmtree(clip_dir, ignore_errors=True)
+        raise
+
 # Example usage
 if __name__ == "__main__":
-    # Load your image
-    input_image = Image.open("./images/61F3p01-OpL._AC_SL1500_.jpg")
+    with profile_run("video_generation"):
+        # Load your image
+        input_image = Image.open("./images/61F3p01-OpL._AC_SL1500_.jpg")
     
-    # Your prompt describing the desired video
-    prompt = "drone view flying over the product. 4k, photorealistic, shallow depth of field."
+        # Your prompt describing the desired video
+        prompt = "drone view flying over the product. 4k, photorealistic, shallow depth of field."
     
-    # Generate the video
-    video_bytes = generate_video_from_image(
-        image=input_image,
-        prompt=prompt,
-        output_path="output_video.mp4"
-    )
+        if "--storyboard" in sys.argv[1:]:
+            # Generate a multi-shot storyboard from several product shots (one Nova Reel job per shot)
+            storyboard_path = generate_storyboard(
+                shots=[
+                    (input_image, prompt),
+                    (Image.open("./images/71PMCXRxt4L._AC_SL1500_.jpg"), "slow orbit around the product on a marble table"),
+                    (Image.open("./images/81vLYHVwqjL._AC_SL1500_.jpg"), "close-up of the product, soft studio lighting"),
+                ],
+                output_path="storyboard.mp4"
+            )
+        else:
+            # Generate the video
+            video_bytes = generate_video_from_image(
+                image=input_image,
+                prompt=prompt,
+                output_path="output_video.mp4"
+            )
 
-    print(video_bytes)
\ No newline at end of file
+            print(video_bytes)
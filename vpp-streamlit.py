@@ -6,37 +6,141 @@ pip install streamlit-drawable-canvas==0.9.3 streamlit==1.40.1
 import streamlit as st
 from streamlit_drawable_canvas import st_canvas
 from PIL import Image, ImageDraw
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import time
 import numpy as np
-from outpainting import outpaint_with_mask_prompt
-from image_tagging import get_product_description
-from util import rotation, homography_transform
+import profiling
+from outpainting import outpaint_with_mask_prompt, outpaint_with_mask_image
+from image_tagging import stream_product_description
+from util import rotation, homography_transform, MemoryBudget
+from image_dedupe import HashIndex
 
 # Set up the page layout
 st.set_page_config(page_title="Content Generation", layout="wide")
 
-# Initialize the canvas size and a blank white canvas
+# Profile this rerun when GENAI_PROFILE is set; a no-op otherwise. A rerun cut
+# short by st.rerun() is finished at the start of the next one
+profiling.stop(st.session_state.pop("profile_session", None))
+st.session_state.profile_session = profiling.start("vpp-streamlit")
+
+# Initialize the canvas size and the per-session canvas memory budget, which
+# covers the session's canvas and mask and the snapshots taken for a generation
 canvas_size = (512, 512)
-blank_canvas = np.full((*canvas_size, 3), 255, dtype=np.uint8)
+CANVAS_BUDGET_MB = 16
+
+# Blank background for the drawing canvas, built once per process instead of per rerun
+@st.cache_resource
+def get_blank_background():
+    return Image.new("RGB", (canvas_size[1], canvas_size[0]), (255, 255, 255))
+
+# Worker pools for Bedrock calls so reruns never block on the network. Tagging
+# and generation get separate pools shared across sessions: a generation can
+# take minutes (read_timeout=300), and must not hold up the few-second tagging
+# calls. Each session runs at most one job of each kind at a time.
+TAGGING_WORKERS = 8
+GENERATION_WORKERS = 8
+
+@st.cache_resource
+def get_tagging_executor():
+    return ThreadPoolExecutor(max_workers=TAGGING_WORKERS, thread_name_prefix="tagging")
+
+@st.cache_resource
+def get_generation_executor():
+    return ThreadPoolExecutor(max_workers=GENERATION_WORKERS, thread_name_prefix="generation")
+
+# Perceptual-hash index of uploads and descriptions of canonical images, shared
+# across sessions so near-duplicate uploads reuse an existing description
+@st.cache_resource
+def get_dedupe_index():
+    return HashIndex(), {}
+
+# Decode an upload once per content digest; the file object itself is not hashed.
+# cache_resource hands every rerun the same read-only array instead of a fresh copy
+@st.cache_resource(max_entries=8)
+def decode_upload(image_digest, _uploaded_image):
+    _uploaded_image.seek(0)
+    image_np = np.asarray(Image.open(_uploaded_image).convert("RGB"))
+    image_np.flags.writeable = False
+    return image_np
+
+# Consume the description stream in a worker thread, publishing partial text
+@profiling.profiled("vpp-streamlit-tagging")
+def describe_product(image, partial):
+    description = ""
+    for description in stream_product_description(image):
+        partial["text"] = description
+    return description
+
+# Poll background jobs and rerun the app once one of them finishes
+@st.fragment(run_every=0.25)
+def poll_jobs():
+    for job_key, label in (("tagging_job", "Describing product"), ("generation_job", "Generating image")):
+        job = st.session_state.get(job_key)
+        if job is None:
+            continue
+        future, started = job[:2]
+        if not future.done():
+            partial = st.session_state.tagging_partial.get("text") if job_key == "tagging_job" else None
+            st.info(f"{label}... {time.monotonic() - started:.1f}s" + (f"\n\n{partial}" if partial else ""))
+            continue
+        st.session_state[job_key] = None
+        if job_key == "generation_job":
+            # The canvas and mask snapshots are no longer referenced
+            st.session_state.canvas_budget.release(job[2])
+        try:
+            result = future.result()
+        except Exception as e:
+            st.session_state.job_error = f"{label} failed: {e}"
+        else:
+            if job_key == "tagging_job":
+                st.session_state.product_description = result
+                get_dedupe_index()[1][st.session_state.tagging_canonical] = result
+            else:
+                # Write the result into the session's canvas rather than replacing it
+                result = result.convert("RGB")
+                if result.size != (canvas_size[1], canvas_size[0]):
+                    result = result.resize((canvas_size[1], canvas_size[0]))
+                st.session_state["canvas_image"][...] = np.asarray(result)
+        st.rerun()
 
 # Initialize product_description in session state if not present
 if "product_description" not in st.session_state:
     st.session_state.product_description = ""
 
-# Initialize last_uploaded_image in session state if not present
-if "last_uploaded_image" not in st.session_state:
-    st.session_state.last_uploaded_image = None
+# Initialize the digest of the last uploaded image in session state if not present
+if "last_upload_digest" not in st.session_state:
+    st.session_state.last_upload_digest = None
+
+# Initialize background jobs, stored as (future, start time) pairs, and the last job error;
+# a generation job also holds the bytes of its snapshots reserved from the canvas budget
+for job_key in ("tagging_job", "generation_job", "job_error"):
+    if job_key not in st.session_state:
+        st.session_state[job_key] = None
 
 # Sidebar for user controls
 st.sidebar.header("Controls")
 uploaded_image = st.sidebar.file_uploader("Upload an Image for Product Canvas", type=["png", "jpg", "jpeg"])
-# Generate description whenever a new image is uploaded
+# Generate description in the background whenever a new image is uploaded
 if uploaded_image:
-    # Check if this is a new image upload by comparing with last uploaded image
-    current_image_bytes = uploaded_image.getvalue()
-    if (st.session_state.last_uploaded_image is None or 
-        current_image_bytes != st.session_state.last_uploaded_image):
-        st.session_state.product_description = get_product_description(Image.open(uploaded_image))
-        st.session_state.last_uploaded_image = current_image_bytes
+    # Check if this is a new image upload by comparing content digests
+    upload_digest = hashlib.sha256(uploaded_image.getbuffer()).hexdigest()
+    left_canvas_np = decode_upload(upload_digest, uploaded_image)
+    if upload_digest != st.session_state.last_upload_digest:
+        # Reuse the description of a near-duplicate image when there is one
+        dedupe_index, descriptions = get_dedupe_index()
+        canonical, _ = dedupe_index.find_or_add(left_canvas_np, upload_digest)
+        if canonical in descriptions:
+            st.session_state.product_description = descriptions[canonical]
+            # Drop any tagging job still running for a previous upload so it cannot overwrite this
+            st.session_state.tagging_job = None
+        else:
+            st.session_state.tagging_partial = {}
+            future = get_tagging_executor().submit(describe_product, Image.fromarray(left_canvas_np),
+                                           st.session_state.tagging_partial)
+            st.session_state.tagging_job = (future, time.monotonic())
+            st.session_state.tagging_canonical = canonical
+        st.session_state.last_upload_digest = upload_digest
 
 # Use the stored product description as default value in text input
 product_prompt = st.sidebar.text_input(
@@ -56,8 +160,6 @@ reset_button = st.sidebar.button("Reset Composition Canvas")
 # Product Canvas
 st.subheader("Product Canvas")
 if uploaded_image:
-    left_canvas = Image.open(uploaded_image).convert("RGB")
-    left_canvas_np = np.array(left_canvas)
     st.image(left_canvas_np, caption="Product Canvas", use_container_width=True)
 else:
     st.info("Upload an image to display on the Product Canvas.")
@@ -68,12 +170,23 @@ col1, col2 = st.columns(2)
 with col1:
     # Position Canvas
     st.subheader("Position Canvas")
-    if reset_button:
-        st.session_state["canvas_image"] = blank_canvas.copy()
-
-    # Initialize session state for the canvas
+    # Initialize session state for the canvas and the mask of placed products,
+    # allocated once per session within its budget and then updated in place
+    if "canvas_budget" not in st.session_state:
+        st.session_state.canvas_budget = MemoryBudget(CANVAS_BUDGET_MB * 2**20)
     if "canvas_image" not in st.session_state:
-        st.session_state["canvas_image"] = blank_canvas.copy()
+        try:
+            # Image (RGB) and mask (one channel): 4 bytes per pixel
+            st.session_state.canvas_budget.reserve(canvas_size[0] * canvas_size[1] * 4)
+        except MemoryError as e:
+            st.error(f"The canvas does not fit in this session's memory budget: {e}")
+            st.stop()
+        st.session_state["canvas_image"] = np.full((*canvas_size, 3), 255, dtype=np.uint8)
+        st.session_state["canvas_mask"] = np.full(canvas_size, 255, dtype=np.uint8)
+
+    if reset_button:
+        st.session_state["canvas_image"].fill(255)
+        st.session_state["canvas_mask"].fill(255)
 
     # Interactive drawing canvas
     canvas_result = st_canvas(
@@ -81,7 +194,7 @@ with col1:
         stroke_width=3,
         stroke_color="red",
         background_color="#FFFFFF",
-        background_image=Image.fromarray(blank_canvas.copy()),
+        background_image=get_blank_background(),
         update_streamlit=True,
         height=canvas_size[0],
         width=canvas_size[1],
@@ -94,7 +207,6 @@ if insert_button:
     if uploaded_image and canvas_result.json_data:
         # Extract bounding box data
         objects = canvas_result.json_data.get("objects", [])
-        right_image = Image.fromarray(st.session_state["canvas_image"])
 
         for obj in objects:
             if obj["type"] == "rect":
@@ -107,27 +219,56 @@ if insert_button:
                 print("ScaleX, ScaleY: ", scaleX, scaleY)
                 print("Rotation: ", angle)
                 print("Bounding box: ", coordinates)
-                # Transform the left canvas image and insert it into the bounding box
-                right_image = homography_transform(left_canvas, right_image, coordinates)
-
-        # Update the canvas
-        st.session_state["canvas_image"] = np.array(right_image)
+                # Transform the decoded product array and warp it into the session's
+                # canvas in place, marking the placed quad in the product mask
+                homography_transform(left_canvas_np, st.session_state["canvas_image"], coordinates,
+                                     mask=st.session_state["canvas_mask"])
     else:
         st.warning("Please upload an image and draw bounding boxes first.")
 
 if generate_button:
-    if "canvas_image" in st.session_state and product_prompt and background_prompt:
-        # Convert the canvas image to PIL format for processing
-        composition_image = Image.fromarray(st.session_state["canvas_image"])
+    if st.session_state.generation_job is not None:
+        st.warning("An image is already being generated.")
+    elif "canvas_image" in st.session_state and product_prompt and background_prompt:
+        snapshot_bytes = st.session_state["canvas_image"].nbytes + st.session_state["canvas_mask"].nbytes
+        try:
+            st.session_state.canvas_budget.reserve(snapshot_bytes)
+        except MemoryError as e:
+            st.warning(f"Not enough session memory to start a generation: {e}")
+        else:
+            # Snapshot the canvas and mask now: both are updated in place by later
+            # inserts and resets while the job may still be queued. Image.fromarray
+            # copies an RGB array but shares memory with a 2-D one, so the mask is copied
+            composition_image = Image.fromarray(st.session_state["canvas_image"])
+            canvas_mask = st.session_state["canvas_mask"].copy()
 
-        # Generate the image using the outpainting function
-        result_image = outpaint_with_mask_prompt(composition_image, background_prompt, product_prompt)
-        st.session_state["canvas_image"] = np.array(result_image) # Update the canvas state
+            # Generate the image in the background using the outpainting function. Use the
+            # mask of placed products when there is one, else let Nova Canvas segment the product
+            if (canvas_mask == 0).any():
+                future = get_generation_executor().submit(outpaint_with_mask_image, composition_image,
+                                                          background_prompt, Image.fromarray(canvas_mask))
+            else:
+                future = get_generation_executor().submit(outpaint_with_mask_prompt, composition_image,
+                                                          background_prompt, product_prompt)
+            st.session_state.generation_job = (future, time.monotonic(), snapshot_bytes)
     else:
         st.warning("Please ensure all fields are filled correctly before generating.")
 
+if st.session_state.job_error:
+    st.error(st.session_state.job_error)
+    st.session_state.job_error = None
+
+if st.session_state.tagging_job is not None or st.session_state.generation_job is not None:
+    with st.sidebar:
+        poll_jobs()
+
 with col2:
     # Composition Canvas
     st.subheader("Composition Canvas")
     if "canvas_image" in st.session_state:
-        st.image(st.session_state["canvas_image"], caption="Composition Canvas", width=canvas_size[0])
\ No newline at end of file
+        st.image(st.session_state["canvas_image"], caption="Composition Canvas", width=canvas_size[0])
+
+# Report this session's canvas memory, including snapshots held by a running generation
+st.sidebar.caption(f"Canvas memory: {st.session_state.canvas_budget.report()}")
+
+profiling.stop(st.session_state.pop("profile_session", None))